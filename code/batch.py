@@ -0,0 +1,220 @@
+"""
+Batch export of many databases, one saved configuration each.
+Every configuration runs in its own process, at most `jobs` at a time, the largest databases first.
+A job running longer than `timeout` seconds is terminated together with its worker processes.
+The log records of the jobs are sent to this process and logged with the database name,
+a summary of all jobs is logged at the end.
+"""
+import glob
+import multiprocessing
+import os
+import queue
+import signal
+import subprocess
+import time
+from logging.handlers import QueueHandler, QueueListener
+from logger_cfg import logger
+from engine import ExportEngine, read_config
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+POLL_SECONDS = 0.2
+
+
+class DatabaseContext:
+    """
+    Log filter prefixing the messages of a job with its database name
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def filter(self, record):
+        record.msg = f"[{self.name}] {record.getMessage()}"
+        record.args = None
+        return True
+
+
+def _run_job(job_id, config_path, name, options, resume, refresh_schema, log_queue, results):
+    """
+    Body of a job process: runs one configuration, the log goes to log_queue, the outcome to results.
+    On POSIX the job leads its own process group, so a timeout terminates its worker processes with it.
+    """
+    if os.name != "nt":
+        os.setpgrp()
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.addFilter(DatabaseContext(name))
+    try:
+        engine = ExportEngine()
+        engine.load_config(config_path)
+        engine.options.update(options)
+        engine.resume = resume
+        engine.refresh_schema = refresh_schema
+        row_counts = engine.run()
+        results.put((job_id, STATUS_OK, row_counts, ""))
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        results.put((job_id, STATUS_FAILED, {}, str(e)))
+
+
+def find_configs(paths):
+    """
+    Configuration files: the given files and the export configurations in the given directories
+    """
+    configs = []
+    for path in paths:
+        if not os.path.isdir(path):
+            configs.append(path)
+            continue
+        for candidate in sorted(glob.glob(os.path.join(path, "*.json"))):
+            try:
+                read_config(candidate)
+            except (OSError, ValueError):
+                continue
+            configs.append(candidate)
+    return configs
+
+
+class BatchJob:
+    """
+    Export of one configuration and its outcome.
+    A configuration listed twice runs twice, jobs are identified by their position in the batch.
+    """
+
+    def __init__(self, job_id, config_path):
+        self.job_id = job_id
+        self.config_path = config_path
+        self.database = os.path.basename(config_path)
+        self.size = 0
+        self.status = ""
+        self.error = ""
+        self.row_counts = {}
+        self.started = None
+        self.seconds = 0.0
+        self.process = None
+
+    def finish(self, status, error=""):
+        """
+        Records the outcome, the duration ends when it is known
+        """
+        self.seconds = time.perf_counter() - self.started
+        self.status = status
+        self.error = error
+
+    def summary(self):
+        return {
+            "config": self.config_path,
+            "database": self.database,
+            "status": self.status,
+            "seconds": round(self.seconds, 1),
+            "rows": sum(self.row_counts.values()),
+            "error": self.error
+        }
+
+
+def collect_results(results, running, timeout=POLL_SECONDS):
+    """
+    Reads every queued result, waiting at most timeout for the first one.
+    Results of jobs no longer running (terminated on timeout) are ignored.
+    :param running: Running jobs by job_id
+    """
+    while True:
+        try:
+            job_id, status, row_counts, error = results.get(timeout=timeout)
+        except queue.Empty:
+            return
+        timeout = 0
+        job = running.get(job_id)
+        if job is None:
+            logger.warning(f"Result of a finished job ignored: job {job_id + 1}")
+            continue
+        job.row_counts = row_counts
+        job.finish(status, error)
+
+
+def terminate_tree(process):
+    """
+    Terminates a job process and the worker processes it started
+    """
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    process.join()
+
+
+def run_batch(config_paths, jobs=None, timeout=None, options=None, resume=False, refresh_schema=False):
+    """
+    Runs the configurations in a bounded pool of processes
+    :param jobs: Number of databases exported at the same time, the number of CPUs by default
+    :param timeout: Seconds after which a job is terminated, no limit by default
+    :param options: Options overriding the options of every configuration
+    :return: summary of every job, see BatchJob.summary
+    """
+    jobs = max(1, int(jobs or os.cpu_count() or 1))
+    batch = [BatchJob(job_id, config_path) for job_id, config_path in enumerate(config_paths)]
+    pending = []
+    for job in batch:
+        try:
+            db_path = read_config(job.config_path)["db_path"]
+        except Exception as e:
+            job.status = STATUS_FAILED
+            job.error = f"Configuration upload fail: {e}"
+            logger.error(f"[{job.database}] {job.error}")
+            continue
+        job.database = os.path.basename(db_path)
+        job.size = os.path.getsize(db_path) if os.path.isfile(db_path) else 0
+        pending.append(job)
+    pending.sort(key=lambda job: job.size)
+    log_queue = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    listener = QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+    listener.start()
+    running = {}
+    logger.info(f"Batch export of {len(pending)} databases, {jobs} at a time.")
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                job = pending.pop()
+                job.process = multiprocessing.Process(
+                    target=_run_job, name=f"export-{job.database}",
+                    args=(job.job_id, job.config_path, job.database, options or {}, resume, refresh_schema,
+                          log_queue, results))
+                job.started = time.perf_counter()
+                job.process.start()
+                running[job.job_id] = job
+            collect_results(results, running)
+            for job_id, job in list(running.items()):
+                if job.process.is_alive():
+                    if job.status or timeout is None or time.perf_counter() - job.started < timeout:
+                        continue
+                    job.finish(STATUS_TIMEOUT, f"Terminated after {timeout} s")
+                    terminate_tree(job.process)
+                    logger.error(f"[{job.database}] {job.error}")
+                elif not job.status:
+                    # The result of a job is sent just before its process ends
+                    collect_results(results, running, 0)
+                    if not job.status:
+                        job.finish(STATUS_FAILED, f"Process exit code {job.process.exitcode}")
+                job.process.join()
+                del running[job_id]
+    finally:
+        for job in running.values():
+            terminate_tree(job.process)
+        listener.stop()
+    summary = [job.summary() for job in batch]
+    log_summary(summary)
+    return summary
+
+
+def log_summary(summary):
+    logger.info("Batch summary:")
+    for job in summary:
+        logger.info(f"  {job['database']:<30} {job['status']:<8} {job['seconds']:8.1f}s {job['rows']:12d} rows"
+                    f"{'  ' + job['error'] if job['error'] else ''}")
+    failed = sum(1 for job in summary if job["status"] != STATUS_OK)
+    logger.info(f"{len(summary) - failed} of {len(summary)} databases exported.")
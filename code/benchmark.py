@@ -0,0 +1,338 @@
+"""
+Micro-benchmarks of the export pipeline stages on the pure-Python fake DAO objects.
+COM dispatch costs are not emulated, the number of emulated COM calls is reported next to the timings.
+With --suite the complete export runs on generated databases of the given sizes instead: throughput,
+introspection and dependency resolution time and peak memory are measured and saved as JSON,
+a saved run can be compared with --compare.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from fake_dao import FakeRecordset, FakeDatabase, synthetic_spec, DEFAULT_TYPE_MIX
+from row_reader import GetRowsReader, open_row_reader, DEFAULT_CHUNK_BYTES
+from encoders import build_encoders, build_row_encoder
+from relations import RelationshipGraph
+from engine import DAO_TYPES
+from exporter import write_rows
+from loader import SqliteLoader
+from logger_cfg import logger
+
+parser = argparse.ArgumentParser(description="MS Access to SQL Export Tool benchmarks")
+
+
+def make_rows(rows, columns):
+    return [tuple(f"value {r}.{c}" if c % 2 else r * columns + c for c in range(columns)) for r in range(rows)]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def bench_row_reader(rows=100000, columns=10, fetch_sizes=(100, 1000, 10000)):
+    """
+    Per-field cursor walk, as in the original data loop, against GetRows blocks of different sizes
+    """
+    column_names = [f"c{c}" for c in range(columns)]
+    data = make_rows(rows, columns)
+    results = []
+
+    def cursor_walk():
+        recordset = FakeRecordset(column_names, data)
+        count = 0
+        while not recordset.EOF:
+            [recordset.Fields(column).Value for column in column_names]
+            recordset.MoveNext()
+            count += 1
+        return recordset, count
+
+    elapsed, (recordset, count) = timed(cursor_walk)
+    results.append(("cursor", elapsed, count, recordset.calls))
+
+    for fetch_rows in fetch_sizes:
+        def getrows_walk():
+            recordset = FakeRecordset(column_names, data)
+            count = sum(1 for _ in GetRowsReader(recordset, fetch_rows))
+            return recordset, count
+
+        elapsed, (recordset, count) = timed(getrows_walk)
+        results.append((f"GetRows({fetch_rows})", elapsed, count, recordset.calls))
+    return results
+
+
+def legacy_encode(row):
+    values = []
+    for value in row:
+        if value is None:
+            values.append("NULL")
+        elif isinstance(value, str):
+            values.append(f"'{str(value)}'".replace("'", "''"))
+        elif isinstance(value, (int, float)):
+            values.append(str(value))
+        else:
+            values.append(f"'{str(value)}'")
+    return values
+
+
+def bench_encoders(rows=100000, repeat=3):
+    """
+    The original isinstance chain against the per-column encoders, called once per value,
+    and the compiled row encoder of the dialects, on a mixed-type row.
+    The encoded rows are discarded and the best of repeat runs is kept, so that garbage collection
+    of the results does not blur the comparison.
+    """
+    field_types = [4, 4, 10, 10, 7, 5, 8, 1, 3, 12]
+    sample = (42, 7, "O'Neil", "Main street 5", 3.25, Decimal("19.99"), datetime(2024, 1, 31, 12, 30), True, None,
+              None)
+    data = [sample] * rows
+    encoders = build_encoders(field_types, DAO_TYPES)
+
+    def encode_columns(row):
+        return [encode(value) for encode, value in zip(encoders, row)]
+
+    results = []
+    for name, encode_row in (("isinstance chain", legacy_encode), ("column encoders", encode_columns),
+                             ("row encoder", build_row_encoder(field_types, DAO_TYPES))):
+        def encode_all():
+            for row in data:
+                encode_row(row)
+
+        elapsed = min(timed(encode_all)[0] for _ in range(repeat))
+        results.append((name, elapsed, rows, 0))
+    return results
+
+
+def bench_load(rows=100000):
+    """
+    Script generation followed by its replay into SQLite, against the direct load with executemany
+    """
+    db = FakeDatabase({"tables": [{"name": "Items", "rows": rows, "primary_key": "ID", "fields": [
+        {"name": "ID", "type": 4}, {"name": "Name", "type": 10, "size": 50}, {"name": "Price", "type": 5},
+        {"name": "Weight", "type": 7}, {"name": "Created", "type": 8}, {"name": "Active", "type": 1},
+        {"name": "Picture", "type": 11, "blob_size": 64}]}]})
+    table = db.TableDefs("Items")
+    relationships = RelationshipGraph()
+    options = {"fetch_rows": 1000, "batch_rows": 500, "batch_bytes": 1024 * 1024, "commit_every": 0,
+               "large_values": "", "chunk_bytes": DEFAULT_CHUNK_BYTES}
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def script_replay():
+            script_path = os.path.join(temp_dir, "items.sql")
+            loader = SqliteLoader(os.path.join(temp_dir, "script.db"))
+            loader.create_table(table, relationships, DAO_TYPES)
+            with open(script_path, "w", encoding="utf-8") as sql_file:
+                write_rows(sql_file, db.OpenRecordset("SELECT * FROM [Items]"), table, options, DAO_TYPES)
+            with open(script_path, "r", encoding="utf-8") as sql_file:
+                loader.connection.executescript(sql_file.read())
+            count = loader.connection.execute("SELECT COUNT(*) FROM Items").fetchone()[0]
+            loader.close()
+            return count
+
+        def direct_load():
+            loader = SqliteLoader(os.path.join(temp_dir, "direct.db"))
+            loader.create_table(table, relationships, DAO_TYPES)
+            count = loader.insert_rows(table, open_row_reader(db.OpenRecordset("SELECT * FROM [Items]"),
+                                                              options["fetch_rows"]), DAO_TYPES)
+            loader.commit()
+            loader.close()
+            return count
+
+        for name, func in (("script + replay", script_replay), ("direct load", direct_load)):
+            elapsed, count = timed(func)
+            results.append((name, elapsed, count, 0))
+    return results
+
+
+def bench_startup(repeat=5):
+    """
+    Cold start of a fresh interpreter importing the command line engine or the GUI.
+    Reports whether tkinter or pandas were loaded.
+    """
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    probe = "import sys; import {module}; print(int('tkinter' in sys.modules), int('pandas' in sys.modules))"
+    results = []
+    for name, module in (("command line", "engine"), ("GUI", "gui")):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process = subprocess.run([sys.executable, "-c", probe.format(module=module)], cwd=code_dir,
+                                     capture_output=True, text=True)
+            timings.append(time.perf_counter() - start)
+            if process.returncode:
+                break
+        if process.returncode:
+            results.append((name, None, process.stderr.strip().splitlines()[-1]))
+        else:
+            tkinter_loaded, pandas_loaded = process.stdout.split()
+            results.append((name, min(timings), f"tkinter: {tkinter_loaded == '1'}, pandas: {pandas_loaded == '1'}"))
+    return results
+
+
+def report_startup(results):
+    print("Startup")
+    for name, elapsed, details in results:
+        timing = f"{elapsed:8.3f}s" if elapsed is not None else "  failed"
+        print(f"  {name:<20} {timing} {details}")
+
+
+def run_export(spec_path, sql_path, workers):
+    """
+    Export with the default metrics report and the DAO calls counted
+    """
+    from engine import ExportEngine
+    engine = ExportEngine({"backend": "fake", "workers": workers, "dao_metrics": True})
+    engine.db_path = spec_path
+    engine.sql_path = sql_path
+    tables = engine.introspect()
+    final_list, _, _ = engine.resolve(tables)
+    row_counts = engine.export(final_list, final_list)
+    return engine, row_counts
+
+
+def bench_export(tables, rows, columns=8, types=DEFAULT_TYPE_MIX, fk_depth=2, blob_size=256, workers=1,
+                 memory=True):
+    """
+    End-to-end export of a generated database, all tables with data.
+    Timings come from a first run, the peak memory from a second one traced by tracemalloc,
+    which runs several times slower.
+    :param memory: Measure the peak memory
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        spec_path = os.path.join(temp_dir, "source.json")
+        with open(spec_path, "w") as f:
+            json.dump(synthetic_spec(tables, rows, columns, types, fk_depth, blob_size), f)
+        sql_path = os.path.join(temp_dir, "export.sql")
+        engine, row_counts = run_export(spec_path, sql_path, workers)
+        phases = engine.metrics.phases
+        totals = engine.metrics.totals()
+        peak_memory = None
+        if memory:
+            tracemalloc.start()
+            try:
+                run_export(spec_path, sql_path, workers)
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    total_rows = sum(row_counts.values())
+    return {
+        "scenario": f"{tables}x{rows}",
+        "tables": tables,
+        "rows_per_table": rows,
+        "columns": columns,
+        "types": list(types),
+        "fk_depth": fk_depth,
+        "blob_size": blob_size,
+        "workers": workers,
+        "rows": total_rows,
+        "bytes": totals["bytes"],
+        "dao_calls": totals["dao_calls"],
+        "introspect_seconds": phases["introspect"],
+        "resolve_seconds": phases["resolve"],
+        "export_seconds": phases["export"],
+        "rows_per_sec": total_rows / phases["export"],
+        "peak_memory_bytes": peak_memory
+    }
+
+
+def run_suite(table_counts, row_counts, **parameters):
+    results = []
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        for tables in table_counts:
+            for rows in row_counts:
+                result = bench_export(tables, rows, **parameters)
+                peak_memory = result["peak_memory_bytes"]
+                print(f"  {result['scenario']:<14} {result['export_seconds']:8.3f}s "
+                      f"{result['rows_per_sec']:12.0f} rows/s resolve {result['resolve_seconds'] * 1000:8.2f}ms "
+                      f"peak {f'{peak_memory / 1024 / 1024:8.1f} MB' if peak_memory is not None else '-'}")
+                results.append(result)
+    finally:
+        logger.setLevel(level)
+    return {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results
+    }
+
+
+def compare_suite(baseline, suite, threshold=0.1):
+    """
+    Prints the change against a saved run by scenario, changes worse than threshold are marked
+    """
+    print("Compared with", baseline["started"])
+    previous = {result["scenario"]: result for result in baseline["results"]}
+    for result in suite["results"]:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        changes = []
+        for key, higher_is_better in (("rows_per_sec", True), ("resolve_seconds", False),
+                                      ("peak_memory_bytes", False)):
+            if not result[key] or not old[key]:
+                continue
+            change = result[key] / old[key] - 1
+            worse = -change if higher_is_better else change
+            changes.append(f"{key} {change:+7.1%}{' REGRESSION' if worse > threshold else ''}")
+        print(f"  {result['scenario']:<14} {', '.join(changes)}")
+
+
+def report(title, results):
+    """
+    Timings of the strategies of a stage, with the speedup over the first one
+    """
+    print(title)
+    baseline = results[0][1]
+    for name, elapsed, rows, calls in results:
+        print(f"  {name:<20} {elapsed:8.3f}s {rows / elapsed:12.0f} rows/s {baseline / elapsed:6.2f}x "
+              f"{calls:10d} COM calls")
+
+
+def main():
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per table")
+    parser.add_argument("--columns", type=int, default=10, help="Columns per table")
+    parser.add_argument("--suite", action="store_true", help="End-to-end export suite on generated databases")
+    parser.add_argument("--tables", default="10,50", help="Suite: comma separated table counts")
+    parser.add_argument("--table-rows", default="1000,10000", help="Suite: comma separated rows per table")
+    parser.add_argument("--types", default=",".join(map(str, DEFAULT_TYPE_MIX)),
+                        help="Suite: comma separated DAO type codes of the columns")
+    parser.add_argument("--fk-depth", type=int, default=2, help="Suite: length of the relationship chains")
+    parser.add_argument("--blob-size", type=int, default=256, help="Suite: length of Binary and Memo values")
+    parser.add_argument("--workers", type=int, default=1, help="Suite: export processes")
+    parser.add_argument("--no-memory", action="store_true", help="Suite: skip the traced run measuring peak memory")
+    parser.add_argument("--output", help="Suite: save the results into this JSON file")
+    parser.add_argument("--compare", help="Suite: JSON file of an earlier run to compare with")
+    args = parser.parse_args()
+    if args.suite:
+        print("Export suite")
+        suite = run_suite([int(n) for n in args.tables.split(",")], [int(n) for n in args.table_rows.split(",")],
+                          columns=args.columns, types=[int(n) for n in args.types.split(",")],
+                          fk_depth=args.fk_depth, blob_size=args.blob_size, workers=args.workers,
+                          memory=not args.no_memory)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(suite, f, indent=4)
+        if args.compare:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                compare_suite(json.load(f), suite)
+        return
+    report("Row reading", bench_row_reader(args.rows, args.columns))
+    report("Value encoding", bench_encoders(args.rows))
+    report("SQLite load", bench_load(args.rows))
+    report_startup(bench_startup())
+
+
+if __name__ == "__main__":
+    main()
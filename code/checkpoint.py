@@ -0,0 +1,126 @@
+"""
+Checkpoint manifest of a running export.
+The manifest is written next to the SQL script after every completed export unit: the planned units,
+the number of completed ones, the output position at that point (the script parts and their sizes) and,
+by table, the exported rows and the last exported key of a partitioned table. An interrupted export is resumed
+from the first incomplete unit, the partial tail of the script is cut off first, see sinks.OutputSink.
+The manifest is removed when the export completes.
+"""
+import json
+import os
+from exporter import ExportUnit, key_json
+
+MANIFEST_VERSION = 3
+# Options shaping the output, an export is resumed only with the options it was started with
+RESUME_OPTIONS = ("dialect", "data_dir", "large_values", "compression", "split", "split_bytes", "partition_rows",
+                  "columnar", "load_into", "tables", "incremental")
+
+
+def manifest_path(sql_path):
+    return f"{os.path.splitext(sql_path)[0]}.manifest.json"
+
+
+def resume_options(options):
+    """
+    The RESUME_OPTIONS of the export options, as they read back from the manifest
+    """
+    return json.loads(json.dumps({name: options[name] for name in RESUME_OPTIONS if name in options}))
+
+
+class Checkpoint:
+    def __init__(self, path, tables, upload, units, fingerprints=None, options=None):
+        """
+        :param tables: Tables in dependency order
+        :param upload: Tables exported with data
+        :param units: Planned export units, see exporter.plan_units
+        :param fingerprints: Incremental state saved when the export completes, see incremental.plan_delta
+        :param options: Export options, the RESUME_OPTIONS among them are recorded
+        """
+        self.path = path
+        self.tables = list(tables)
+        self.upload = sorted(upload)
+        self.options = resume_options(options or {})
+        self.units = units
+        self.fingerprints = fingerprints
+        self.completed = 0
+        self.position = None
+        self.progress = {}
+
+    def pending(self):
+        return self.units[self.completed:]
+
+    def row_counts(self):
+        return {tab_name: table["rows"] for tab_name, table in self.progress.items()}
+
+    def to_dict(self):
+        return {
+            "version": MANIFEST_VERSION,
+            "tables": self.tables,
+            "upload": self.upload,
+            "options": self.options,
+            "units": [unit.to_dict() for unit in self.units],
+            "fingerprints": self.fingerprints,
+            "completed": self.completed,
+            "position": self.position,
+            "progress": self.progress
+        }
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, default=key_json)
+        os.replace(temp_path, self.path)
+
+    def commit(self, sink=None, unit=None):
+        """
+        Makes the script durable up to the current position and records it.
+        Without a script (direct load, columnar files) only the progress is recorded.
+        :param sink: sinks.OutputSink of the script
+        """
+        if sink is not None:
+            self.position = sink.commit(unit)
+        self.save()
+
+    def unit_done(self, unit, row_count, sink=None):
+        table = self.progress.setdefault(unit.tab_name, {"rows": 0, "complete": False, "last_key": None})
+        table["rows"] += row_count
+        table["complete"] = unit.last
+        if unit.part is not None:
+            table["last_key"] = unit.high
+        self.completed += 1
+        self.commit(sink, unit)
+
+    def finish(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, path, tables, upload, options=None):
+        """
+        Checkpoint of an interrupted export, None if there is none
+        :param options: Export options, the RESUME_OPTIONS among them must be the recorded ones
+        :raise ValueError: the manifest belongs to another export or was written with other options
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except OSError:
+            return None
+        if (data.get("version") != MANIFEST_VERSION or data["tables"] != list(tables)
+                or data["upload"] != sorted(upload)):
+            raise ValueError(f"Checkpoint manifest does not match this export: {path}")
+        current = resume_options(options or {})
+        changed = sorted(name for name in set(current) | set(data["options"])
+                         if current.get(name) != data["options"].get(name))
+        if changed:
+            raise ValueError(f"The export was started with other {', '.join(changed)} options, "
+                             f"start again without --resume: {path}")
+        checkpoint = cls(path, data["tables"], data["upload"],
+                         [ExportUnit.from_dict(unit) for unit in data["units"]], data["fingerprints"])
+        checkpoint.options = data["options"]
+        checkpoint.completed = data["completed"]
+        checkpoint.position = data["position"]
+        checkpoint.progress = data["progress"]
+        return checkpoint
@@ -0,0 +1,235 @@
+"""
+Columnar export: one Parquet or CSV file per table, fed by the same GetRows blocks as the SQL export.
+Parquet files are written in row groups of row_group_rows rows, typed from the DAO field types,
+so only one row group is held in memory. Columns of types missing from dao_types (Decimal, GUID, BigInt)
+are written as strings. pyarrow is needed for Parquet only.
+A CSV file comes with a <table>.schema.json sidecar describing the columns.
+File names are the table names made safe by dialects.file_name, the original name is kept in the sidecar
+and in the Parquet schema metadata.
+Files are written under a temporary name and renamed when the table is complete.
+"""
+import csv
+import json
+import os
+from decimal import Decimal
+from logger_cfg import logger
+from dialects import file_name
+from encoders import column_formats, TEXT_FORMATS
+from row_reader import open_row_reader
+from exporter import open_rows, primary_key
+
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+
+
+def to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def to_datetime(value):
+    # pywintypes datetimes carry a time zone which DAO does not set, Access dates are local
+    return value.replace(tzinfo=None) if getattr(value, "tzinfo", None) is not None else value
+
+
+def to_bytes(value):
+    return bytes(value)
+
+
+def to_text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+PARQUET_CONVERTERS = {
+    "Currency": to_decimal,
+    "Date": to_datetime,
+    "Binary": to_bytes
+}
+
+
+def csv_boolean(value):
+    return "true" if value else "false"
+
+
+# Other values are written by the csv module with str
+CSV_CONVERTERS = {
+    "Boolean": csv_boolean,
+    "Date": TEXT_FORMATS["Date"],
+    "Binary": TEXT_FORMATS["Binary"]
+}
+
+
+def arrow_types(pa):
+    return {
+        "Boolean": pa.bool_(),
+        "Byte": pa.uint8(),
+        "Integer": pa.int16(),
+        "Long": pa.int32(),
+        "Currency": pa.decimal128(19, 4),
+        "Single": pa.float32(),
+        "Double": pa.float64(),
+        "Date": pa.timestamp("s"),
+        "Binary": pa.binary(),
+        "Text": pa.string()
+    }
+
+
+def column_schema(table, dao_types):
+    key_field = primary_key(table)
+    return {
+        "table": table.Name,
+        "columns": [{"name": field.Name, "type": dao_types.get(field.Type, "Unknown"), "size": field.Size,
+                     "nullable": not field.Required} for field in table.Fields],
+        "primary_key": key_field.Name if key_field is not None else None
+    }
+
+
+class ColumnarWriter:
+    """
+    Writes the rows of one table into a columnar file
+    """
+    extension = ""
+
+    def __init__(self, path, table, dao_types, options):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.table = table
+        self.type_names = [dao_types.get(field.Type) for field in table.Fields]
+        self.options = options
+        self.row_count = 0
+
+    def add_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """
+        Removes the temporary file of an interrupted table
+        """
+        os.remove(self.temp_path)
+
+
+class CsvTableWriter(ColumnarWriter):
+    extension = ".csv"
+
+    def __init__(self, path, table, dao_types, options):
+        super().__init__(path, table, dao_types, options)
+        formats = column_formats([field.Type for field in table.Fields], dao_types, CSV_CONVERTERS)
+        self.converters = [(i, converter) for i, converter in enumerate(formats) if converter is not None]
+        self.file = open(self.temp_path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([field.Name for field in table.Fields])
+        self.schema = column_schema(table, dao_types)
+        self.schema.update({"format": FORMAT_CSV, "delimiter": ",", "header": True, "null": "", "binary": "hex"})
+
+    def add_rows(self, rows):
+        if self.converters:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i, converter in self.converters:
+                    if row[i] is not None:
+                        row[i] = converter(row[i])
+        self.writer.writerows(rows)
+        self.row_count += len(rows)
+
+    def close(self):
+        self.file.close()
+        self.schema["rows"] = self.row_count
+        with open(f"{os.path.splitext(self.path)[0]}.schema.json", "w", encoding="utf-8") as f:
+            json.dump(self.schema, f, indent=4)
+        super().close()
+
+    def abort(self):
+        self.file.close()
+        super().abort()
+
+
+class ParquetTableWriter(ColumnarWriter):
+    extension = ".parquet"
+
+    def __init__(self, path, table, dao_types, options):
+        super().__init__(path, table, dao_types, options)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+        self.pa = pyarrow
+        types = arrow_types(pyarrow)
+        self.types = [types.get(type_name, pyarrow.string()) for type_name in self.type_names]
+        self.converters = column_formats([field.Type for field in table.Fields], dao_types,
+                                         dict(dict.fromkeys(types), **PARQUET_CONVERTERS), to_text)
+        self.schema = pyarrow.schema([pyarrow.field(field.Name, field_type, nullable=not field.Required)
+                                      for field, field_type in zip(table.Fields, self.types)],
+                                     metadata={"table": table.Name})
+        self.row_group_rows = max(1, int(options["row_group_rows"]))
+        self.columns = [[] for _ in self.types]
+        self.buffered = 0
+        self.writer = pyarrow.parquet.ParquetWriter(self.temp_path, self.schema,
+                                                    compression=options["parquet_compression"])
+
+    def add_rows(self, rows):
+        for row in rows:
+            for column, value in zip(self.columns, row):
+                column.append(value)
+            self.buffered += 1
+            if self.buffered == self.row_group_rows:
+                self.write_row_group()
+        self.row_count += len(rows)
+
+    def write_row_group(self):
+        if not self.buffered:
+            return
+        arrays = []
+        for values, field_type, converter in zip(self.columns, self.types, self.converters):
+            if converter is not None:
+                values = [None if value is None else converter(value) for value in values]
+            arrays.append(self.pa.array(values, type=field_type))
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.columns = [[] for _ in self.types]
+        self.buffered = 0
+
+    def close(self):
+        self.write_row_group()
+        self.writer.close()
+        super().close()
+
+    def abort(self):
+        self.writer.close()
+        super().abort()
+
+
+WRITERS = {
+    FORMAT_CSV: CsvTableWriter,
+    FORMAT_PARQUET: ParquetTableWriter
+}
+
+
+def columnar_path(output_dir, tab_name, options):
+    return os.path.join(output_dir, f"{file_name(tab_name)}{WRITERS[options['columnar']].extension}")
+
+
+def export_columnar(output_dir, db, unit, schema, options, dao_types):
+    """
+    Writes the rows of one table into <output_dir>/<table>.csv or .parquet
+    :param unit: Whole-table export unit, see exporter.ExportUnit
+    :return: number of exported rows
+    """
+    table = schema.tables[unit.tab_name]
+    writer_class = WRITERS[options["columnar"]]
+    path = columnar_path(output_dir, table.Name, options)
+    logger.info(f"Export data from: {table.Name} into {path}.")
+    writer = writer_class(path, table, dao_types, options)
+    reader = open_row_reader(open_rows(db, table), options["fetch_rows"], progress=options.get("progress"))
+    try:
+        for rows in reader.batches():
+            writer.add_rows(rows)
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        reader.close()
+    writer.close()
+    logger.info(f"Table {table.Name} export complete.")
+    return writer.row_count
@@ -0,0 +1,428 @@
+"""
+Target dialects of the SQL script.
+The default dialect writes the original script: CREATE TABLE with the DAO type names and multi-row INSERTs.
+"postgresql" writes real PostgreSQL types and COPY ... FROM STDIN blocks,
+"mysql" writes real MySQL types, tab-separated data files and LOAD DATA LOCAL INFILE statements.
+Both create the primary and foreign keys after the data load.
+
+With the large_values option Memo and Long Binary values are streamed chunk by chunk, one row at a time:
+"inline" writes them as literals, "files" into side files under data_dir referenced from the script
+(original format only: COPY and LOAD DATA LOCAL INFILE cannot read client-side files per value).
+"""
+import os
+import re
+from encoders import build_encoders, build_row_encoder, column_formats, TEXT_FORMATS
+from row_reader import LargeValue
+from sql_writer import InsertWriter, OUTPUT_BUFFER
+
+DEFAULT_DIALECT = ""
+LARGE_INLINE = "inline"
+LARGE_FILES = "files"
+MEMO_TYPE = 12
+LONG_BINARY_TYPE = 11
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def primary_key_columns(table):
+    return [field.Name for index in table.Indexes if index.Primary for field in index.Fields]
+
+
+def path_literal(path):
+    return path.replace("\\", "/").replace("'", "''")
+
+
+def file_name(name):
+    """
+    File name of a table, column or key: characters other than letters, digits, ".", "-" and "_"
+    and a leading "." are replaced with "_", so the name stays inside its directory
+    """
+    return re.sub(r"^\.|[^\w.-]", "_", name)
+
+
+class LargeValueNames:
+    """
+    Side file names of the large values of a table: <table>/<primary key>.<column>,
+    or <table>/<range>-<row>.<column> for tables without a single-column primary key
+    """
+
+    def __init__(self, table, part):
+        key_columns = primary_key_columns(table)
+        names = [field.Name for field in table.Fields]
+        self.key_index = names.index(key_columns[0]) if len(key_columns) == 1 else None
+        self.table = table
+        self.part = part or 0
+
+    def name(self, row, row_number, field):
+        key = row[self.key_index] if self.key_index is not None else f"{self.part}-{row_number}"
+        return os.path.join(file_name(self.table.Name), file_name(f"{key}.{field.Name}"))
+
+
+class Dialect:
+    """
+    Original script format
+    """
+    deferred_constraints = False
+    data_files = False
+    large_formats = {
+        "Binary": ("X'", TEXT_FORMATS["Binary"], "'"),
+        "Text": ("'", lambda chunk: chunk.replace("'", "''"), "'"),
+    }
+
+    def quote(self, name):
+        return f"'{name}'"
+
+    def file_reference(self, path, type_name):
+        # readfile() of the SQLite shell
+        expression = f"readfile('{path_literal(path)}')"
+        return expression if type_name == "Binary" else f"CAST({expression} AS TEXT)"
+
+    def write_large(self, out, value, type_name, options, file_name):
+        """
+        Writes a large value chunk by chunk, inline or into a side file referenced from the script
+        """
+        if options["large_values"] == LARGE_FILES:
+            path = os.path.abspath(os.path.join(options["data_dir"], file_name))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as side_file:
+                for chunk in value.chunks():
+                    side_file.write(chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk))
+            out.write(self.file_reference(path, type_name))
+            return
+        prefix, encode, suffix = self.large_formats[type_name]
+        out.write(prefix)
+        for chunk in value.chunks():
+            out.write(encode(chunk))
+        out.write(suffix)
+
+    def write_streamed_values(self, out, row, row_number, encoders, separator, table, type_names, options, names):
+        for i, value in enumerate(row):
+            if i:
+                out.write(separator)
+            if isinstance(value, LargeValue):
+                self.write_large(out, value, type_names[i], options, names.name(row, row_number, table.Fields[i]))
+            else:
+                out.write(encoders[i](value))
+
+    def delete_rows(self, tab_name):
+        return f"DELETE FROM {self.quote(tab_name)};\n"
+
+    def write_structure(self, sql_file, table, relationships, dao_types):
+        sql_file.write(f"-- Table: {table.Name}\n")
+        sql_file.write(f"CREATE TABLE '{table.Name}' (\n")
+        column_definitions = []
+        for field in table.Fields:
+            cNull = 'NOT NULL' if field.Required else ''
+            fSize = f"({field.Size})" if field.Size else ''
+            column_definitions.append(
+                f" '{field.Name}'"
+                f" {dao_types.get(field.Type, 'Unknown')}{fSize}"
+                f" {cNull}"
+            )
+        column_primkeys = []
+        for index in table.Indexes:
+            if index.Primary:
+                column_primkeys.append(index.Fields[0].Name)
+        if len(column_primkeys):
+            keysStr = ",".join(column_primkeys)
+            column_definitions.append(f" PRIMARY KEY ({keysStr} AUTOINCREMENT)")
+        for fk in relationships.foreign_keys(table.Name):
+            column_definitions.append(fk.sql())
+        sql_file.write(",\n".join(column_definitions))
+        sql_file.write("\n);\n\n")
+
+    def write_rows(self, sql_file, reader, table, options, dao_types, part=None):
+        """
+        Writes the rows of a reader
+        :param part: Key range number of a partitioned table
+        :return: number of written rows
+        """
+        encode = build_row_encoder([field.Type for field in table.Fields], dao_types)
+        writer = InsertWriter(sql_file, table.Name, [field.Name for field in table.Fields], options["batch_rows"],
+                              options["batch_bytes"], options["commit_every"])
+        for rows in reader.batches():
+            writer.add_rows(map(encode, rows))
+        writer.close()
+        return writer.row_count
+
+    def write_streamed_rows(self, sql_file, reader, table, options, dao_types, part=None):
+        """
+        Writes the rows of a chunked reader, one INSERT per row
+        :return: number of written rows
+        """
+        header = f"INSERT INTO '{table.Name}' ({', '.join(field.Name for field in table.Fields)}) VALUES ("
+        encoders = build_encoders([field.Type for field in table.Fields], dao_types)
+        type_names = [dao_types.get(field.Type) for field in table.Fields]
+        names = LargeValueNames(table, part)
+        row_count = 0
+        for rows in reader.batches():
+            for row in rows:
+                sql_file.write(header)
+                self.write_streamed_values(sql_file, row, row_count, encoders, ", ", table, type_names, options,
+                                           names)
+                sql_file.write(");\n")
+                row_count += 1
+        return row_count
+
+    def write_constraints(self, sql_file, tables, relationships):
+        """
+        Primary and foreign keys of the tables, written after all data when deferred_constraints is set
+        :param tables: Table snapshots in dependency order
+        """
+
+
+class TargetDialect(Dialect):
+    """
+    Dialect with real target types, CREATE TABLE without keys and deferred constraints
+    """
+    deferred_constraints = True
+    types = {}
+    text_type = ""
+    memo_type = ""
+    binary_type = ""
+    long_binary_type = ""
+    escapes = COPY_ESCAPES
+    null = "\\N"
+    true = "t"
+    false = "f"
+    binary_prefix = ""
+
+    @property
+    def large_formats(self):
+        return {
+            "Binary": (self.binary_prefix, self.binary_chunk, ""),
+            "Text": ("", self.text, ""),
+        }
+
+    def quote(self, name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def column_type(self, field, type_name):
+        if type_name == "Text":
+            if field.Type == MEMO_TYPE or not field.Size:
+                return self.memo_type
+            return self.text_type.format(size=field.Size)
+        if type_name == "Binary":
+            if field.Type == LONG_BINARY_TYPE or not field.Size:
+                return self.long_binary_type
+            return self.binary_type.format(size=field.Size)
+        return self.types.get(type_name, self.memo_type)
+
+    def write_structure(self, sql_file, table, relationships, dao_types):
+        sql_file.write(f"-- Table: {table.Name}\n")
+        column_definitions = [
+            f" {self.quote(field.Name)} {self.column_type(field, dao_types.get(field.Type))}"
+            f"{' NOT NULL' if field.Required else ''}" for field in table.Fields]
+        sql_file.write(f"CREATE TABLE {self.quote(table.Name)} (\n")
+        sql_file.write(",\n".join(column_definitions))
+        sql_file.write("\n);\n\n")
+
+    def write_constraints(self, sql_file, tables, relationships):
+        quote = self.quote
+        statements = []
+        for table in tables:
+            key_columns = primary_key_columns(table)
+            if key_columns:
+                statements.append(f"ALTER TABLE {quote(table.Name)} ADD PRIMARY KEY "
+                                  f"({', '.join(map(quote, key_columns))});\n")
+        for table in tables:
+            for fk in relationships.foreign_keys(table.Name):
+                statements.append(f"ALTER TABLE {quote(table.Name)} ADD CONSTRAINT {quote(fk.name)} "
+                                  f"FOREIGN KEY ({', '.join(map(quote, fk.columns))}) "
+                                  f"REFERENCES {quote(fk.ref_table)} ({', '.join(map(quote, fk.ref_columns))});\n")
+        if statements:
+            sql_file.write("-- Keys\n")
+            sql_file.write("".join(statements))
+            sql_file.write("\n")
+
+    def text(self, value):
+        return str(value).translate(self.escapes)
+
+    def boolean(self, value):
+        return self.true if value else self.false
+
+    binary_chunk = staticmethod(TEXT_FORMATS["Binary"])
+
+    def binary(self, value):
+        return self.binary_prefix + self.binary_chunk(value)
+
+    def column_formats(self, table, dao_types):
+        """
+        Text format of each column for non-null values
+        """
+        formats = dict(TEXT_FORMATS, Boolean=self.boolean, Binary=self.binary, Text=self.text)
+        return column_formats([field.Type for field in table.Fields], dao_types, formats, self.text)
+
+    def column_encoders(self, table, dao_types):
+        null = self.null
+
+        def encoder(format):
+            return lambda value: null if value is None else format(value)
+
+        return [encoder(format) for format in self.column_formats(table, dao_types)]
+
+    def row_encoder(self, table, dao_types):
+        """
+        Encodes a row as one tab-separated line
+        """
+        formats = self.column_formats(table, dao_types)
+        null = self.null
+
+        def encode(row):
+            return "\t".join([null if value is None else format(value)
+                               for format, value in zip(formats, row)]) + "\n"
+
+        return encode
+
+    def write_streamed_lines(self, out, reader, table, options, dao_types, part):
+        """
+        Writes the rows of a chunked reader as tab-separated lines
+        :return: number of written rows
+        """
+        encoders = self.column_encoders(table, dao_types)
+        type_names = [dao_types.get(field.Type) for field in table.Fields]
+        names = LargeValueNames(table, part)
+        row_count = 0
+        for rows in reader.batches():
+            for row in rows:
+                self.write_streamed_values(out, row, row_count, encoders, "\t", table, type_names, options, names)
+                out.write("\n")
+                row_count += 1
+        return row_count
+
+
+class PostgresDialect(TargetDialect):
+    types = {
+        "Boolean": "boolean",
+        "Byte": "smallint",
+        "Integer": "smallint",
+        "Long": "integer",
+        "Currency": "numeric(19,4)",
+        "Single": "real",
+        "Double": "double precision",
+        "Date": "timestamp",
+    }
+    text_type = "varchar({size})"
+    memo_type = "text"
+    binary_type = "bytea"
+    long_binary_type = "bytea"
+    # bytea hex input, its backslash is doubled for the COPY text format
+    binary_prefix = "\\\\x"
+
+    def copy_header(self, table):
+        quote = self.quote
+        return f"COPY {quote(table.Name)} ({', '.join(quote(field.Name) for field in table.Fields)}) FROM STDIN;\n"
+
+    def write_streamed_rows(self, sql_file, reader, table, options, dao_types, part=None):
+        """
+        :raise ValueError: side files requested, COPY data cannot reference them
+        """
+        if options["large_values"] == LARGE_FILES:
+            raise ValueError("Large values cannot be written into side files with COPY, use large_values inline")
+        sql_file.write(self.copy_header(table))
+        row_count = self.write_streamed_lines(sql_file, reader, table, options, dao_types, part)
+        sql_file.write("\\.\n")
+        return row_count
+
+    def write_rows(self, sql_file, reader, table, options, dao_types, part=None):
+        encode = self.row_encoder(table, dao_types)
+        sql_file.write(self.copy_header(table))
+        row_count = 0
+        for rows in reader.batches():
+            sql_file.write("".join(map(encode, rows)))
+            row_count += len(rows)
+        sql_file.write("\\.\n")
+        return row_count
+
+
+class MysqlDialect(TargetDialect):
+    types = {
+        "Boolean": "BOOLEAN",
+        "Byte": "TINYINT UNSIGNED",
+        "Integer": "SMALLINT",
+        "Long": "INT",
+        "Currency": "DECIMAL(19,4)",
+        "Single": "FLOAT",
+        "Double": "DOUBLE",
+        "Date": "DATETIME",
+    }
+    text_type = "VARCHAR({size})"
+    memo_type = "LONGTEXT"
+    binary_type = "VARBINARY({size})"
+    long_binary_type = "LONGBLOB"
+    data_files = True
+    escapes = TSV_ESCAPES
+    true = "1"
+    false = "0"
+
+    def quote(self, name):
+        return "`" + name.replace("`", "``") + "`"
+
+    def data_path(self, table, options, part):
+        name = file_name(table.Name)
+        data_file = f"{name}.tsv" if part is None else f"{name}.{part + 1:04d}.tsv"
+        return os.path.abspath(os.path.join(options["data_dir"], data_file))
+
+    def load_statement(self, data_path, table, dao_types):
+        """
+        LOAD DATA statement of a data file, Binary columns are decoded with UNHEX
+        """
+        columns = []
+        assignments = []
+        for i, field in enumerate(table.Fields):
+            if dao_types.get(field.Type) == "Binary":
+                columns.append(f"@v{i}")
+                assignments.append(f"{self.quote(field.Name)} = UNHEX(@v{i})")
+            else:
+                columns.append(self.quote(field.Name))
+        return (f"LOAD DATA LOCAL INFILE '{path_literal(data_path)}' INTO TABLE {self.quote(table.Name)} "
+                f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+                f"{' SET ' + ', '.join(assignments) if assignments else ''};\n")
+
+    def write_rows(self, sql_file, reader, table, options, dao_types, part=None):
+        """
+        Writes the rows into <data_dir>/<table>.tsv (<table>.<part>.tsv for a key range)
+        and a LOAD DATA statement reading it
+        """
+        encode = self.row_encoder(table, dao_types)
+        data_path = self.data_path(table, options, part)
+        row_count = 0
+        with open(data_path, "w", encoding="utf-8", newline="\n", buffering=OUTPUT_BUFFER) as data_file:
+            for rows in reader.batches():
+                data_file.write("".join(map(encode, rows)))
+                row_count += len(rows)
+        sql_file.write(self.load_statement(data_path, table, dao_types))
+        return row_count
+
+    def write_streamed_rows(self, sql_file, reader, table, options, dao_types, part=None):
+        """
+        :raise ValueError: side files requested, LOAD_FILE would read them on the server
+        and silently load NULL where they are missing or not readable
+        """
+        if options["large_values"] == LARGE_FILES:
+            raise ValueError("Large values cannot be written into side files with LOAD DATA LOCAL INFILE, "
+                             "use large_values inline")
+        data_path = self.data_path(table, options, part)
+        with open(data_path, "w", encoding="utf-8", newline="\n", buffering=OUTPUT_BUFFER) as data_file:
+            row_count = self.write_streamed_lines(data_file, reader, table, options, dao_types, part)
+        sql_file.write(self.load_statement(data_path, table, dao_types))
+        return row_count
+
+
+DIALECTS = {
+    DEFAULT_DIALECT: Dialect(),
+    "postgresql": PostgresDialect(),
+    "mysql": MysqlDialect(),
+}
+
+
+def get_dialect(options):
+    """
+    :raise ValueError: unknown dialect
+    """
+    name = options.get("dialect", DEFAULT_DIALECT)
+    if name not in DIALECTS:
+        raise ValueError(f"Unknown SQL dialect: {name}")
+    return DIALECTS[name]
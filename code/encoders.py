@@ -0,0 +1,114 @@
+"""
+Value formats and SQL literal encoders for column values, by DAO type name.
+FORMATS is the single definition of the text form of a value: the SQL literal encoders, and the text formats
+of the other targets (COPY and LOAD DATA lines, CSV, DB-API parameters), are compiled from it.
+An encoder is picked once per column from the DAO field type, so the data loop
+does no type dispatch. build_row_encoder goes one step further and compiles the column expressions
+of a table into a single function per row, with no function call per value.
+"""
+from decimal import Decimal
+
+# Text form of a non-null value, an expression of the value {v}.
+# Dates without fractions of a second and time zone, binary values as upper case hex.
+FORMATS = {
+    "Boolean": '"TRUE" if {v} else "FALSE"',
+    "Byte": "str({v})",
+    "Integer": "str({v})",
+    "Long": "str({v})",
+    "Currency": "str({v})",
+    "Single": "repr({v})",
+    "Double": "repr({v})",
+    "Date": "str({v})[:19]",
+    "Binary": "bytes({v}).hex().upper()",
+    "Text": "{v}",
+}
+# SQL literals quote the text form with a prefix and a suffix, the quotes of Text values are doubled
+QUOTES = {
+    "Date": ("'", "'"),
+    "Binary": ("X'", "'"),
+    "Text": ("'", "'"),
+}
+ESCAPED = {"Text"}
+
+
+def literal_expression(type_name):
+    """
+    SQL literal of a value {v} of the type, types without a format fall back to encode_any
+    """
+    if type_name not in FORMATS:
+        return "encode_any({v})"
+    text = FORMATS[type_name]
+    if type_name in ESCAPED:
+        text = text.replace("{v}", '{v}.replace("\'", "\'\'")')
+    prefix, suffix = QUOTES.get(type_name, ("", ""))
+    if prefix:
+        text = f"{prefix!r} + {text} + {suffix!r}"
+    return '"NULL" if {v} is None else ' + text
+
+
+def compile_function(parameter, expression, unpack=""):
+    """
+    Compiles a function of one parameter returning the expression
+    :param unpack: Names the parameter is unpacked into first
+    """
+    namespace = {"encode_any": encode_any}
+    body = f"    ({unpack}) = {parameter}\n" if unpack else ""
+    exec(f"def function({parameter}):\n{body}    return {expression}\n", namespace)
+    return namespace["function"]
+
+
+def encode_any(value):
+    """
+    Generic encoder for field types without a specialised one
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return ENCODERS["Boolean"](value)
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return ENCODERS["Binary"](value)
+    return ENCODERS["Text"](value)
+
+
+TEXT_FORMATS = {type_name: compile_function("v", expression.format(v="v"))
+                for type_name, expression in FORMATS.items()}
+ENCODERS = {type_name: compile_function("v", literal_expression(type_name).format(v="v")) for type_name in FORMATS}
+
+
+def column_formats(field_types, dao_types, formats=TEXT_FORMATS, default=None):
+    """
+    Format of each column for non-null values
+    :param field_types: DAO type codes of the columns, in column order
+    :param dao_types: Mapping of DAO type codes to type names
+    :param formats: Formats by type name, TEXT_FORMATS with the overrides of a target
+    :param default: Format of the types missing from formats, None when their values are passed through
+    :return: list of formats, one per column
+    """
+    return [formats.get(dao_types.get(field_type), default) for field_type in field_types]
+
+
+def build_encoders(field_types, dao_types):
+    """
+    Builds the encoder list of a table
+    :param field_types: DAO type codes of the columns, in column order
+    :param dao_types: Mapping of DAO type codes to type names
+    :return: list of encoders, one per column
+    """
+    return column_formats(field_types, dao_types, ENCODERS, encode_any)
+
+
+def build_row_encoder(field_types, dao_types):
+    """
+    Compiles the encoders of a table into one function.
+    Each column is an inline expression of the function, types without one fall back to encode_any.
+    :param field_types: DAO type codes of the columns, in column order
+    :param dao_types: Mapping of DAO type codes to type names
+    :return: function taking a row tuple and returning a list of SQL literals
+    """
+    names = [f"v{i}" for i in range(len(field_types))]
+    expressions = [literal_expression(dao_types.get(field_type)).format(v=name)
+                   for field_type, name in zip(field_types, names)]
+    return compile_function("row", f"[{', '.join(f'({expression})' for expression in expressions)}]",
+                            "".join(name + ", " for name in names))
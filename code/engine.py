@@ -0,0 +1,478 @@
+"""
+Headless export engine: connect, introspect, resolve, export.
+Driven by the GUI and by the command line. Imports neither tkinter nor pandas.
+The light modules providing the option defaults, the schema and the connection are imported with the engine;
+the modules running an export (exporter, parallel, loader, columnar, incremental, checkpoint)
+are loaded only when an export runs.
+"""
+import json
+import os
+from io import StringIO
+from logger_cfg import logger, enable_file_logging
+from schema import SchemaSnapshot, fingerprint
+from row_reader import DEFAULT_FETCH_ROWS, DEFAULT_CHUNK_BYTES
+from sql_writer import DEFAULT_BATCH_ROWS, DEFAULT_BATCH_BYTES, DEFAULT_COMMIT_EVERY
+from sources import open_database, release_backend, DEFAULT_BACKEND
+from dialects import get_dialect, DEFAULT_DIALECT, LARGE_FILES
+from sinks import data_dir, DEFAULT_COMPRESSION_LEVEL, DEFAULT_SPLIT_BYTES, SPLIT_NONE
+from metrics import Metrics, metrics_path, DEFAULT_METRICS
+
+CONFIG_INFO = "MS Access to SQL Export configuration file"
+CHECK_MARK = "✔"
+
+# Type names of the DAO DataTypeEnum codes (dbBoolean = 1 ... dbMemo = 12), written into CREATE TABLE
+DAO_TYPES = {
+    1: "Boolean",
+    2: "Byte",
+    3: "Integer",
+    4: "Long",
+    5: "Currency",
+    6: "Single",
+    7: "Double",
+    8: "Date",
+    9: "Binary",
+    10: "Text",
+    11: "Binary",
+    12: "Text"
+}
+
+DEFAULT_OPTIONS = {
+    "fetch_rows": DEFAULT_FETCH_ROWS,
+    "batch_rows": DEFAULT_BATCH_ROWS,
+    "batch_bytes": DEFAULT_BATCH_BYTES,
+    "commit_every": DEFAULT_COMMIT_EVERY,
+    "workers": 1,
+    "partition_rows": 0,
+    "incremental": False,
+    "append_only": [],
+    "watermarks": {},
+    "load_into": "",
+    "load_pragmas": None,
+    "columnar": "",
+    "dialect": DEFAULT_DIALECT,
+    "data_dir": "",
+    "row_group_rows": 65536,
+    "parquet_compression": "snappy",
+    "compression": "",
+    "compression_level": DEFAULT_COMPRESSION_LEVEL,
+    "split": SPLIT_NONE,
+    "split_bytes": DEFAULT_SPLIT_BYTES,
+    "tables": {},
+    "large_values": "",
+    "chunk_bytes": DEFAULT_CHUNK_BYTES,
+    "metrics": DEFAULT_METRICS,
+    "dao_metrics": False,
+    "backend": DEFAULT_BACKEND
+}
+
+
+class SchemaAccessError(Exception):
+    """
+    The system tables needed for introspection cannot be read
+    """
+
+
+def schema_cache_path(config_path):
+    return f"{os.path.splitext(config_path)[0]}.schema.json"
+
+
+def read_config(fpath):
+    """
+    Reads a configuration file saved by the GUI
+    :raise ValueError: the file is not an export configuration
+    """
+    with open(fpath, 'r') as f:
+        config = json.load(f)
+    if config.get('info') != CONFIG_INFO:
+        raise ValueError(f"Not an export configuration file: {fpath}")
+    return config
+
+
+def tree_selection(tree):
+    """
+    Table selection from the "tree" section of a configuration (pandas DataFrame.to_dict layout)
+    :return: (tables to export, tables to export with data)
+    """
+    tables = tree.get("table", {})
+    export = tree.get("export", {})
+    data = tree.get("data", {})
+    export_list = [tables[key] for key in tables if export.get(key) == CHECK_MARK]
+    upload_list = [tables[key] for key in tables if data.get(key) == CHECK_MARK]
+    return export_list, upload_list
+
+
+def output_sql_name(db_path):
+    if db_path:
+        expath = db_path.split('/')
+        fname = expath[-1]
+        catalog = "/".join(expath[:-1])
+        return f"{catalog}/{'_'.join(fname.split('.')[:-1])}.sql"
+    else:
+        return "AccessExport.sql"
+
+
+class ExportEngine:
+    """
+    Export of an MS Access database into an SQL script, without any user interface
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update(options or {})
+        self.dao_types = DAO_TYPES
+        self.db_path = ""
+        self.sql_path = ""
+        self.log_path = ""
+        self.export_list = []
+        self.upload_list = []
+        self.schema_path = ""
+        self.refresh_schema = False
+        self.resume = False
+        self.db = None
+        self.raw_schema = None
+        self.schema = None
+        self.relationships = None
+        self.metrics = Metrics()
+        self.progress = None
+
+    def copy(self):
+        """
+        Engine with the same configuration and schema and its own connection.
+        DAO objects belong to the thread which opened them, an export on another thread runs on a copy.
+        """
+        engine = ExportEngine(self.options)
+        engine.db_path = self.db_path
+        engine.sql_path = self.sql_path
+        engine.log_path = self.log_path
+        engine.export_list = list(self.export_list)
+        engine.upload_list = list(self.upload_list)
+        engine.schema_path = self.schema_path
+        engine.refresh_schema = self.refresh_schema
+        engine.resume = self.resume
+        engine.raw_schema = self.raw_schema
+        engine.schema = self.schema
+        engine.relationships = self.relationships
+        return engine
+
+    def close(self):
+        if self.db is not None:
+            self.db.Close()
+            self.db = None
+            release_backend(self.options["backend"])
+
+    def load_config(self, fpath):
+        """
+        Applies a configuration file: paths, options and the table selection.
+        The options of a previous configuration are reset to the defaults, its database is closed.
+        """
+        config = read_config(fpath)
+        self.close()
+        self.open(config["db_path"])
+        self.sql_path = config["sql_path"]
+        self.log_path = config.get("log_path", "")
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update(config.get("options", {}))
+        self.export_list, self.upload_list = tree_selection(config.get("tree", {}))
+        self.schema_path = schema_cache_path(fpath)
+        return config
+
+    def config(self):
+        return {
+            "info": CONFIG_INFO,
+            "db_path": self.db_path,
+            "sql_path": self.sql_path,
+            "log_path": self.log_path,
+            "options": self.options
+        }
+
+    def open(self, db_path):
+        """
+        Selects the database, the connection is opened when DAO is needed
+        """
+        if db_path != self.db_path:
+            self.close()
+            self.metrics = Metrics()
+        self.db_path = db_path
+        self.raw_schema = None
+        self.schema = None
+        self.relationships = None
+
+    def connect(self):
+        if self.db is None:
+            with self.metrics.phase("connect"):
+                self.db = open_database(self.db_path, self.options["backend"])
+                if self.options["metrics"] and self.options["dao_metrics"]:
+                    self.db = self.metrics.wrap_database(self.db)
+            logger.info(f"DB connected: {self.db_path}")
+        return self.db
+
+    def check_permissions(self):
+        """
+        Read access to the system tables used for introspection
+        """
+        try:
+            recordset = self.db.OpenRecordset("SELECT TOP 1 * FROM MSysObjects")
+            recordset.Close()
+            recordset = self.db.OpenRecordset("SELECT TOP 1 * FROM MSysRelationships")
+            recordset.Close()
+        except Exception as e:
+            raise SchemaAccessError(f"Permissions test failed: {e}") from e
+
+    def introspect(self):
+        """
+        Loads the schema snapshot: from the cache next to the configuration while the database file
+        is unchanged, otherwise over DAO. The snapshot is kept in raw_schema, the exported view
+        with the filters of the "tables" option applied in schema.
+        :return: names of the user tables
+        """
+        if self.schema is None:
+            with self.metrics.phase("introspect"):
+                if self.raw_schema is None:
+                    self.raw_schema = self.load_schema()
+                self.schema = self.apply_filters(self.raw_schema)
+                self.relationships = self.schema.relationships()
+        return self.schema.table_names()
+
+    def load_schema(self):
+        db_fingerprint = fingerprint(self.db_path) if os.path.isfile(self.db_path) else None
+        if self.schema_path and db_fingerprint and not self.refresh_schema:
+            schema = SchemaSnapshot.load(self.schema_path, db_fingerprint)
+            if schema is not None:
+                logger.info(f"Schema loaded from cache: {self.schema_path}")
+                return schema
+        self.connect()
+        self.check_permissions()
+        schema = SchemaSnapshot.from_db(self.db, db_fingerprint)
+        if self.schema_path and db_fingerprint:
+            schema.save(self.schema_path)
+            logger.info(f"Schema cache saved: {self.schema_path}")
+        return schema
+
+    def save_schema(self, schema_path):
+        """
+        Saves the unfiltered snapshot, the filters of a configuration are applied when it is loaded
+        """
+        if self.raw_schema is not None and self.raw_schema.fingerprint:
+            self.schema_path = schema_path
+            self.raw_schema.save(schema_path)
+
+    def apply_filters(self, schema):
+        """
+        Per-table column projections and row filters of the "tables" option
+        """
+        filters = self.options["tables"]
+        for tab_name in filters:
+            if tab_name not in schema.tables:
+                logger.warning(f"Filter of an unknown table ignored: {tab_name}")
+        projected = schema.project(filters)
+        for fk in schema.foreign_keys:
+            if fk not in projected.foreign_keys:
+                logger.info(f"Relationship {fk.name} dropped, its columns are not exported.")
+            elif projected.tables[fk.ref_table].where:
+                logger.warning(f"Table {fk.ref_table} is filtered, rows of {fk.table} may reference missing rows.")
+        return projected
+
+    def load_relationships(self):
+        self.introspect()
+        return self.relationships
+
+    def resolve(self, export_list):
+        """
+        Adds referenced tables and orders the export so that parents precede children
+        :return: (ordered tables, added tables, tables in circular references)
+        """
+        with self.metrics.phase("resolve"):
+            relationships = self.load_relationships()
+            final_list, added_tables = relationships.closure(export_list)
+            final_list, cyclic_tables = relationships.topological_order(final_list)
+        return final_list, added_tables, cyclic_tables
+
+    def export(self, tables, upload_list, output_sql_path=""):
+        """
+        Writes the SQL script, loads the tables straight into the load_into SQLite database,
+        or writes the data of the upload tables into columnar files.
+        Progress is recorded in a checkpoint manifest, with resume set an interrupted export
+        continues from its first incomplete unit. The metrics of the export are saved next to the output.
+        :param tables: Tables in dependency order, see resolve
+        :param upload_list: Tables exported with data
+        :return: number of exported rows by table
+        """
+        output_sql_path = output_sql_path or self.sql_path or output_sql_name(self.db_path)
+        target_path = self.options["load_into"] or output_sql_path
+        if self.options["columnar"]:
+            target_path = self.options["data_dir"] or data_dir(output_sql_path)
+        relationships = self.load_relationships()
+        upload = set(upload_list)
+        db = self.connect() if upload else None
+        self.metrics.begin_export()
+        with self.metrics.phase("plan"):
+            checkpoint, deleted_tables = self.plan(db, tables, upload, relationships, target_path)
+        if self.progress is not None:
+            self.progress.start(checkpoint.pending())
+        with self.metrics.phase("export"):
+            if self.options["columnar"]:
+                self.write_columnar(db, checkpoint, target_path)
+            elif self.options["load_into"]:
+                self.load(db, checkpoint, deleted_tables)
+            else:
+                self.write_script(db, checkpoint, deleted_tables, output_sql_path)
+        with self.metrics.phase("finish"):
+            if checkpoint.fingerprints is not None:
+                from incremental import state_path, load_state, save_state
+                state_file = state_path(target_path)
+                state = load_state(state_file)
+                state.update(checkpoint.fingerprints)
+                save_state(state_file, state)
+            checkpoint.finish()
+        self.save_metrics(target_path)
+        return checkpoint.row_counts()
+
+    def plan(self, db, tables, upload, relationships, target_path):
+        """
+        Checkpoint of the export: loaded to resume, or planned
+        :return: (checkpoint, tables whose rows are deleted before the delta)
+        """
+        from exporter import plan_units
+        from checkpoint import Checkpoint, manifest_path
+        manifest_file = manifest_path(target_path)
+        checkpoint = Checkpoint.load(manifest_file, tables, upload, self.options) if self.resume else None
+        deleted_tables = []
+        if checkpoint is not None:
+            logger.info(f"Resume export: {checkpoint.completed} of {len(checkpoint.units)} units completed.")
+        else:
+            if self.resume:
+                logger.warning(f"No checkpoint found, full export: {manifest_file}")
+            actions = fingerprints = None
+            if self.options["columnar"]:
+                from exporter import ExportUnit, table_size
+                if self.options["incremental"]:
+                    logger.warning("Columnar files are always written in full, the incremental option is ignored.")
+                units = [ExportUnit(tab_name, True, table_size(self.schema.tables[tab_name]))
+                         for tab_name in tables if tab_name in upload]
+            else:
+                if self.options["incremental"]:
+                    from incremental import state_path, load_state, plan_delta, reloaded_tables
+                    state = load_state(state_path(target_path))
+                    actions, fingerprints = plan_delta(db, self.schema, relationships, tables, upload, state,
+                                                       self.options)
+                    deleted_tables = reloaded_tables(tables, actions) if state else []
+                units = plan_units(db, self.schema, tables, upload, self.options, actions)
+            checkpoint = Checkpoint(manifest_file, tables, upload, units, fingerprints, self.options)
+        return checkpoint, deleted_tables
+
+    def unit_metrics(self):
+        """
+        Metrics collecting the samples of the export units, None when the metrics option is off.
+        The DAO calls are counted and timed with the dao_metrics option only, see connect
+        """
+        return self.metrics if self.options["metrics"] else None
+
+    def save_metrics(self, target_path):
+        """
+        Metrics report of the export in the format of the metrics option, none when it is empty
+        """
+        report_format = self.options["metrics"]
+        if not report_format:
+            return
+        path = metrics_path(target_path, report_format)
+        report = self.metrics.save(path, report_format, database=self.db_path, target=target_path)
+        totals = report["totals"]
+        dao_calls = f", {totals['dao_calls']} DAO calls" if totals["dao_calls"] is not None else ""
+        logger.info(f"Exported {totals['rows']} rows, {totals['bytes']} bytes in {report['phases']['export']:.1f}s "
+                    f"({totals['rows_per_sec'] or 0:.0f} rows/s){dao_calls}. Metrics saved: {path}")
+
+    def write_script(self, db, checkpoint, deleted_tables, output_sql_path):
+        """
+        SQL script in the selected dialect. Deferred keys are written after the data of all tables.
+        """
+        from exporter import export_units
+        from sinks import open_sink
+        dialect = get_dialect(self.options)
+        options = dict(self.options, data_dir=self.options["data_dir"] or data_dir(output_sql_path))
+        if dialect.data_files or options["large_values"] == LARGE_FILES:
+            os.makedirs(options["data_dir"], exist_ok=True)
+        preamble = ""
+        if deleted_tables:
+            preamble = f"-- Delta export\n{''.join(map(dialect.delete_rows, deleted_tables))}\n"
+        postamble = ""
+        if dialect.deferred_constraints:
+            postamble = StringIO()
+            created_tables = [self.schema.tables[tab_name] for tab_name in checkpoint.tables
+                              if any(unit.structure and unit.tab_name == tab_name for unit in checkpoint.units)]
+            dialect.write_constraints(postamble, created_tables, self.relationships)
+            postamble = postamble.getvalue()
+        sink = open_sink(output_sql_path, options, checkpoint.position)
+        try:
+            if options["workers"] > 1:
+                from parallel import export_parallel
+                export_parallel(sink, self.db_path, options["backend"], checkpoint.pending(), self.schema,
+                                self.relationships, options, self.dao_types, preamble, checkpoint, postamble,
+                                self.unit_metrics(), self.progress)
+            else:
+                sink.write(preamble)
+                checkpoint.commit(sink)
+                export_units(sink, db, checkpoint.pending(), self.schema, self.relationships, options,
+                             self.dao_types, checkpoint, self.unit_metrics(), self.progress)
+                sink.write(postamble)
+        finally:
+            sink.close()
+
+    def write_columnar(self, db, checkpoint, output_dir):
+        """
+        One CSV or Parquet file per table in output_dir
+        """
+        from columnar import WRITERS, columnar_path, export_columnar
+        if self.options["columnar"] not in WRITERS:
+            raise ValueError(f"Unknown columnar format: {self.options['columnar']}")
+        os.makedirs(output_dir, exist_ok=True)
+        checkpoint.commit()
+        options = dict(self.options, progress=self.progress)
+        metrics = self.unit_metrics()
+        for unit in checkpoint.pending():
+            if self.progress is not None:
+                self.progress.start_unit(unit)
+            timer = metrics.timer() if metrics is not None else None
+            row_count = export_columnar(output_dir, db, unit, self.schema, options, self.dao_types)
+            checkpoint.unit_done(unit, row_count)
+            if metrics is not None:
+                sample = timer.stop(row_count)
+                sample["bytes"] = os.path.getsize(columnar_path(output_dir, unit.tab_name, options))
+                metrics.add(unit.tab_name, sample)
+
+    def load(self, db, checkpoint, deleted_tables):
+        """
+        Direct load into SQLite, one transaction per export unit
+        """
+        from loader import SqliteLoader, DEFAULT_LOAD_PRAGMAS, crash_safe, load_units
+        if self.options["workers"] > 1:
+            logger.info("Direct load runs on one connection, the workers option is ignored.")
+        pragmas = self.options["load_pragmas"]
+        if checkpoint.completed and not crash_safe(DEFAULT_LOAD_PRAGMAS if pragmas is None else pragmas):
+            raise ValueError(f"The load cannot be resumed with the load_pragmas {pragmas}: an interrupted load "
+                             f"may have corrupted the database, start again without --resume")
+        loader = SqliteLoader(self.options["load_into"], pragmas)
+        try:
+            for tab_name in deleted_tables:
+                loader.delete_rows(tab_name)
+            loader.commit()
+            checkpoint.commit()
+            load_units(loader, db, checkpoint.pending(), self.schema, self.relationships, self.options,
+                       self.dao_types, checkpoint, self.unit_metrics(), self.progress)
+        finally:
+            loader.close()
+
+    def run(self):
+        """
+        Complete command line export of the loaded configuration
+        """
+        if self.log_path:
+            enable_file_logging(self.log_path)
+            logger.info(f"Logging in file {self.log_path} enabled")
+        final_list, added_tables, cyclic_tables = self.resolve(self.export_list)
+        logger.info(f"Depended tables were added: {', '.join(added_tables)}")
+        if cyclic_tables:
+            logger.warning(f"Circular references, tables of a cycle exported without ordering among themselves: "
+                           f"{', '.join(cyclic_tables)}")
+        row_counts = self.export(final_list, self.upload_list)
+        logger.info("SQL export completed!")
+        return row_counts
@@ -0,0 +1,337 @@
+"""
+Export of tables: CREATE TABLE statements and data, in the script dialect selected by the options.
+The export is planned as units, whole tables or key ranges, run sequentially here or by the parallel workers.
+Table structures come from the schema snapshot, the database connection is used for data only.
+Key values saved in JSON (checkpoint manifest, incremental state) are written with key_json
+and converted back to the type of the key field when bound to a query, see key_parameter.
+"""
+from datetime import datetime
+from decimal import Decimal
+from logger_cfg import logger
+from row_reader import open_row_reader, large_columns
+from dialects import get_dialect
+
+ACTION_FULL = "full"
+ACTION_SKIP = "skip"
+ACTION_APPEND = "append"
+ACTION_RELOAD = "reload"
+ACTION_LOAD = "load"
+UNKNOWN_SIZE = -1
+
+JET_PARAMETER_TYPES = {
+    1: "Bit",
+    2: "Byte",
+    3: "Short",
+    4: "Long",
+    5: "Currency",
+    6: "IEEESingle",
+    7: "IEEEDouble",
+    8: "DateTime",
+    10: "Text"
+}
+CURRENCY_TYPE = 5
+DATE_TYPE = 8
+KEY_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def key_json(value):
+    """
+    JSON value of a key or watermark: dates as KEY_DATE_FORMAT without time zone, Decimal and other values as str
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        return value.strftime(KEY_DATE_FORMAT)
+    return str(value)
+
+
+def key_parameter(value, key_field):
+    """
+    Key value of a query parameter, a key read back from JSON gets the type of the key field
+    """
+    if not isinstance(value, str):
+        return value
+    if key_field.Type == DATE_TYPE:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    if key_field.Type == CURRENCY_TYPE:
+        return Decimal(value)
+    return value
+
+
+def primary_key(table):
+    """
+    Field of a single-column primary key, None for tables without one or with a composite key
+    """
+    for index in table.Indexes:
+        if index.Primary and index.Fields.Count == 1:
+            return table.Fields(index.Fields[0].Name)
+    return None
+
+
+def select_list(table):
+    return ", ".join(f"[{field.Name}]" for field in table.Fields)
+
+
+def where_clause(table, condition=""):
+    """
+    WHERE clause combining the row filter of the table with a condition
+    """
+    conditions = [f"({table.where})"] if getattr(table, "where", None) else []
+    if condition:
+        conditions.append(condition)
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def partition_key(table, options):
+    """
+    Key field used to split the table into ranges, None if the table is not partitioned
+    """
+    partition_rows = options["partition_rows"]
+    if not partition_rows or table.RecordCount <= partition_rows:
+        return None
+    key_field = primary_key(table)
+    if key_field is None:
+        logger.info(f"Table {table.Name} has no single-column primary key and is not partitioned.")
+    return key_field
+
+
+def key_ranges(db, table, key_field, options, up_to_key=None):
+    """
+    Splits the key space into ranges of partition_rows rows, reading only the key column
+    :param up_to_key: Highest key of the split, rows inserted since the table fingerprint are left out
+    :return: list of (first key, last key, row count)
+    """
+    recordset = open_keys(db, table, key_field, up_to_key=up_to_key, columns=f"[{key_field.Name}]")
+    reader = open_row_reader(recordset, options["fetch_rows"])
+    ranges = []
+    count = 0
+    low = high = None
+    for (key,) in reader:
+        if not count:
+            low = key
+        high = key
+        count += 1
+        if count == options["partition_rows"]:
+            ranges.append((low, high, count))
+            count = 0
+    if count:
+        ranges.append((low, high, count))
+    reader.close()
+    return ranges
+
+
+def open_range(db, table, key_field, low, high):
+    parameter_type = JET_PARAMETER_TYPES.get(key_field.Type, "Text")
+    query_def = db.CreateQueryDef("", f"""
+        PARAMETERS [lo_key] {parameter_type}, [hi_key] {parameter_type};
+        SELECT {select_list(table)} FROM [{table.Name}]
+        {where_clause(table, f"[{key_field.Name}] BETWEEN [lo_key] AND [hi_key]")}
+        ORDER BY [{key_field.Name}]
+        """)
+    query_def.Parameters("lo_key").Value = key_parameter(low, key_field)
+    query_def.Parameters("hi_key").Value = key_parameter(high, key_field)
+    return query_def.OpenRecordset()
+
+
+def open_keys(db, table, key_field, after_key=None, up_to_key=None, columns=None):
+    """
+    Rows ordered by the key, only those with a key above after_key and up to up_to_key when given
+    :param columns: Select list, all the columns of the table by default
+    """
+    columns = columns or select_list(table)
+    conditions = []
+    parameters = {}
+    if after_key is not None:
+        conditions.append(f"[{key_field.Name}] > [lo_key]")
+        parameters["lo_key"] = after_key
+    if up_to_key is not None:
+        conditions.append(f"[{key_field.Name}] <= [hi_key]")
+        parameters["hi_key"] = up_to_key
+    sql = (f"SELECT {columns} FROM [{table.Name}] {where_clause(table, ' AND '.join(conditions))} "
+           f"ORDER BY [{key_field.Name}]")
+    if not parameters:
+        return db.OpenRecordset(sql)
+    parameter_type = JET_PARAMETER_TYPES.get(key_field.Type, "Text")
+    declaration = ", ".join(f"[{name}] {parameter_type}" for name in parameters)
+    query_def = db.CreateQueryDef("", f"PARAMETERS {declaration};\n{sql}")
+    for name, value in parameters.items():
+        query_def.Parameters(name).Value = key_parameter(value, key_field)
+    return query_def.OpenRecordset()
+
+
+def open_rows(db, table, after_key=None, up_to_key=None):
+    """
+    Recordset of the table rows, or only of the rows with a primary key above after_key and up to up_to_key
+    """
+    if after_key is None and up_to_key is None:
+        return db.OpenRecordset(f"SELECT {select_list(table)} FROM [{table.Name}] {where_clause(table)}")
+    return open_keys(db, table, primary_key(table), after_key, up_to_key)
+
+
+def write_rows(sql_file, recordset, table, options, dao_types, part=None):
+    """
+    Writes the rows of a recordset. With the large_values option Memo and Long Binary values
+    are read and written in chunks, one row at a time.
+    """
+    large = large_columns(table) if options["large_values"] else None
+    reader = open_row_reader(recordset, options["fetch_rows"], large, options["chunk_bytes"],
+                             options.get("progress"))
+    dialect = get_dialect(options)
+    if large:
+        row_count = dialect.write_streamed_rows(sql_file, reader, table, options, dao_types, part)
+    else:
+        row_count = dialect.write_rows(sql_file, reader, table, options, dao_types, part)
+    reader.close()
+    return row_count
+
+
+def write_data(sql_file, db, table, options, dao_types, after_key=None, up_to_key=None):
+    """
+    Writes the table rows, or only the rows with a primary key above after_key and up to up_to_key
+    """
+    sql_file.write(f"-- Filling data for {table.Name}\n")
+    row_count = write_rows(sql_file, open_rows(db, table, after_key, up_to_key), table, options, dao_types)
+    sql_file.write("\n")
+    return row_count
+
+
+def export_table(sql_file, db, table, with_data, relationships, options, dao_types, structure=True, after_key=None,
+                 up_to_key=None):
+    """
+    Writes the structure and, if requested, the data of one table
+    :param table: DAO TableDef or its schema snapshot
+    :param structure: Write the CREATE TABLE statement
+    :param after_key: Write only the rows with a primary key above this value
+    :param up_to_key: Write only the rows with a primary key up to this value
+    :return: number of exported rows
+    """
+    tab_name = table.Name
+    if structure:
+        logger.info(f"Export table structure: {tab_name}.")
+        get_dialect(options).write_structure(sql_file, table, relationships, dao_types)
+    row_count = 0
+    if with_data:
+        logger.info(f"Export data from: {tab_name}.")
+        row_count = write_data(sql_file, db, table, options, dao_types, after_key, up_to_key)
+    logger.info(f"Table {tab_name} export complete.")
+    return row_count
+
+
+def export_range(sql_file, db, table, part, low, high, last, relationships, options, dao_types, structure=True):
+    """
+    Writes one key range of a partitioned table.
+    The first range also carries the table structure, the last one closes the data block.
+    :return: number of exported rows
+    """
+    tab_name = table.Name
+    if part == 0:
+        if structure:
+            logger.info(f"Export table structure: {tab_name}.")
+            get_dialect(options).write_structure(sql_file, table, relationships, dao_types)
+        sql_file.write(f"-- Filling data for {table.Name}\n")
+    logger.info(f"Export data from: {tab_name}, range {part + 1}.")
+    row_count = write_rows(sql_file, open_range(db, table, primary_key(table), low, high), table, options, dao_types,
+                           part)
+    if last:
+        sql_file.write("\n")
+        logger.info(f"Table {tab_name} export complete.")
+    return row_count
+
+
+class ExportUnit:
+    """
+    A whole table, or one key range of a partitioned table.
+    size is the planned row count, UNKNOWN_SIZE when DAO does not know it (RecordCount is -1 for linked tables).
+    An incremental export bounds the rows of a table by the keys of its fingerprint: above after_key, up to up_to_key.
+    """
+
+    def __init__(self, tab_name, with_data, size, part=None, low=None, high=None, last=True, structure=True,
+                 after_key=None, up_to_key=None):
+        self.tab_name = tab_name
+        self.with_data = with_data
+        self.size = size
+        self.part = part
+        self.low = low
+        self.high = high
+        self.last = last
+        self.structure = structure
+        self.after_key = after_key
+        self.up_to_key = up_to_key
+
+    def run(self, sql_file, db, schema, relationships, options, dao_types):
+        table = schema.tables[self.tab_name]
+        if self.part is None:
+            return export_table(sql_file, db, table, self.with_data, relationships, options, dao_types,
+                                self.structure, self.after_key, self.up_to_key)
+        return export_range(sql_file, db, table, self.part, self.low, self.high, self.last,
+                            relationships, options, dao_types, self.structure)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def table_size(table):
+    """
+    Row count of a table for planning, UNKNOWN_SIZE for linked tables
+    """
+    return table.RecordCount if table.RecordCount >= 0 else UNKNOWN_SIZE
+
+
+def plan_units(db, schema, tables, upload, options, actions=None):
+    """
+    Splits the export into units, in the order of the final script.
+    Whole tables, or key ranges of the tables selected by partition_key.
+    :param schema: SchemaSnapshot of the database
+    :param tables: Tables in dependency order
+    :param upload: Tables exported with data
+    :param actions: Incremental export plan, see incremental.plan_delta, reloaded tables always get their data
+    """
+    units = []
+    for tab_name in tables:
+        table = schema.tables[tab_name]
+        action, after_key, up_to_key, rows = (actions or {}).get(tab_name, (ACTION_FULL, None, None, None))
+        if action == ACTION_SKIP:
+            continue
+        structure = action == ACTION_FULL
+        with_data = tab_name in upload or action == ACTION_RELOAD
+        size = table_size(table) if rows is None else rows
+        key_field = partition_key(table, options) if with_data and action != ACTION_APPEND else None
+        if key_field is None:
+            units.append(ExportUnit(tab_name, with_data, size, structure=structure, after_key=after_key,
+                                    up_to_key=up_to_key))
+            continue
+        ranges = key_ranges(db, table, key_field, options, up_to_key)
+        logger.info(f"Table {tab_name} is split into {len(ranges)} key ranges.")
+        for part, (low, high, count) in enumerate(ranges):
+            units.append(ExportUnit(tab_name, True, count, part, low, high,
+                                    part == len(ranges) - 1, structure))
+    return units
+
+
+def export_units(sql_file, db, units, schema, relationships, options, dao_types, checkpoint=None, metrics=None,
+                 progress=None):
+    """
+    Sequential export of the planned units on one connection
+    :param checkpoint: Checkpoint updated after every unit, see checkpoint.Checkpoint
+    :param metrics: Metrics collecting a sample of every unit, see metrics.Metrics
+    :param progress: Progress advanced by every block of rows, see progress.Progress
+    :return: number of exported rows by table
+    """
+    output = metrics.timed_output(sql_file) if metrics is not None else sql_file
+    options = dict(options, progress=progress)
+    row_counts = {}
+    for unit in units:
+        if progress is not None:
+            progress.start_unit(unit)
+        timer = metrics.timer(sql_file) if metrics is not None else None
+        row_count = unit.run(output, db, schema, relationships, options, dao_types)
+        row_counts[unit.tab_name] = row_counts.get(unit.tab_name, 0) + row_count
+        if checkpoint is not None:
+            checkpoint.unit_done(unit, row_count, output)
+        if timer is not None:
+            metrics.add(unit.tab_name, timer.stop(row_count))
+    return row_counts
@@ -0,0 +1,472 @@
+"""
+Pure-Python stand-ins for DAO objects.
+They mimic the small part of the DAO object model used by the exporter,
+so the export pipeline can be exercised and benchmarked without Windows and MS Access.
+
+A fake database is described by a JSON spec, table rows are generated on the fly from the row number:
+{
+    "tables": [
+        {"name": "Customers", "rows": 1000, "primary_key": "ID",
+         "fields": [{"name": "ID", "type": 4}, {"name": "Name", "type": 10, "size": 50, "required": true}]}
+    ],
+    "relationships": [
+        {"name": "CustomersOrders", "table": "Orders", "columns": ["CustomerID"],
+         "ref_table": "Customers", "ref_columns": ["ID"]}
+    ]
+}
+synthetic_spec generates the spec of a database of a given size for the benchmark suite.
+"""
+import json
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+RELATIONSHIP_FIELDS = ["szRelationship", "szObject", "szColumn", "szReferencedObject", "szReferencedColumn", "icolumn",
+                       "ccolumn", "grbit"]
+BASE_DATE = datetime(2000, 1, 1)
+DEFAULT_TYPE_MIX = (10, 4, 5, 8, 1, 7, 10, 12, 11)
+COMPARISONS = {
+    "between": lambda value, bounds: bounds[0] <= value <= bounds[1],
+    "=": lambda value, other: value == other,
+    "<>": lambda value, other: value != other,
+    ">": lambda value, other: value > other,
+    ">=": lambda value, other: value >= other,
+    "<": lambda value, other: value < other,
+    "<=": lambda value, other: value <= other,
+}
+
+
+class FakeField:
+    def __init__(self, name, value=None, type=10, size=0, required=False):
+        self.Name = name
+        self.Value = value
+        self.Type = type
+        self.Size = size
+        self.Required = required
+
+    def FieldSize(self):
+        return None if self.Value is None else len(self.Value)
+
+    def GetChunk(self, offset, count):
+        return self.Value[offset:offset + count]
+
+
+class FakeIndex:
+    def __init__(self, name, fields, primary=False):
+        self.Name = name
+        self.Fields = FakeCollection(FakeField(field) for field in fields)
+        self.Primary = primary
+
+
+class FakeCollection(list):
+    """
+    DAO collection: iterable, indexed by position or by name when called
+    """
+
+    def __call__(self, key):
+        if isinstance(key, int):
+            return self[key]
+        for item in self:
+            if item.Name == key:
+                return item
+        raise KeyError(f"Item not found in this collection: {key}")
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class FakeFields:
+    def __init__(self, recordset):
+        self._recordset = recordset
+
+    @property
+    def Count(self):
+        return len(self._recordset.columns)
+
+    def __call__(self, key):
+        recordset = self._recordset
+        recordset.calls += 1
+        index = key if isinstance(key, int) else recordset.columns.index(key)
+        value = None if recordset.position >= len(recordset.rows) else recordset.rows[recordset.position][index]
+        return FakeField(recordset.columns[index], value)
+
+    def __iter__(self):
+        return (self(i) for i in range(self.Count))
+
+
+class FakeRecordset:
+    """
+    Recordset over a sequence of row tuples.
+    Every emulated COM call is counted in `calls`.
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = rows
+        self.position = 0
+        self.calls = 0
+        self.Fields = FakeFields(self)
+
+    @property
+    def EOF(self):
+        self.calls += 1
+        return self.position >= len(self.rows)
+
+    @property
+    def RecordCount(self):
+        return len(self.rows)
+
+    def MoveNext(self):
+        self.calls += 1
+        self.position += 1
+
+    def GetRows(self, count):
+        """
+        Same layout as DAO: a field-major block, None at the end of the recordset
+        """
+        self.calls += 1
+        block = self.rows[self.position:self.position + count]
+        self.position += len(block)
+        if not block:
+            return None
+        return tuple(zip(*block))
+
+    def Close(self):
+        self.calls += 1
+
+
+class GeneratedRows:
+    """
+    Read-only sequence of table rows computed from the row number
+    """
+
+    def __init__(self, generators, count):
+        self.generators = generators
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self.count))]
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError(key)
+        return self.row(key)
+
+    def row(self, number):
+        return tuple(generate(number) for generate in self.generators)
+
+
+class ProjectedRows:
+    """
+    Column projection of a row sequence
+    """
+
+    def __init__(self, rows, indexes):
+        self.rows = rows
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.project(row) for row in self.rows[key]]
+        return self.project(self.rows[key])
+
+    def project(self, row):
+        return tuple(row[i] for i in self.indexes)
+
+
+class SlicedRows:
+    """
+    Lazy contiguous part of a row sequence
+    """
+
+    def __init__(self, rows, start, stop):
+        self.rows = rows
+        self.start = start
+        self.stop = max(start, stop)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            return self.rows[self.start + start:self.start + stop:step]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(key)
+        return self.rows[self.start + key]
+
+
+def value_generator(field, ref_rows=None, primary=False):
+    """
+    Deterministic value of a column for a row number
+    :param field: Field spec
+    :param ref_rows: Row count of the referenced table for foreign key columns
+    :param primary: Primary key column
+    """
+    field_type = field.get("type", 10)
+    size = field.get("size", 0)
+    name = field["name"]
+    nullable = not field.get("required", False) and not primary and not ref_rows
+    if primary:
+        if field_type == 8:
+            return lambda n: BASE_DATE + timedelta(minutes=n)
+        return lambda n: n + 1
+    if ref_rows:
+        return lambda n: (n * 7919) % ref_rows + 1
+    if field_type == 1:
+        generate = lambda n: n % 2 == 0
+    elif field_type == 2:
+        generate = lambda n: n * 31 % 256
+    elif field_type in (3, 4):
+        generate = lambda n: n * 31 % 32768
+    elif field_type == 5:
+        generate = lambda n: Decimal(n * 137 % 1000000) / 100
+    elif field_type == 6:
+        generate = lambda n: n * 0.5
+    elif field_type == 7:
+        generate = lambda n: n * 1.25
+    elif field_type == 8:
+        generate = lambda n: BASE_DATE + timedelta(minutes=n * 97)
+    elif field_type in (9, 11):
+        length = field.get("blob_size", size or 256)
+        generate = lambda n: bytes((n + i) % 256 for i in range(length))
+    elif field_type == 12:
+        length = field.get("blob_size", 200)
+        generate = lambda n: (f"Memo {name} {n}. It's line text. " * (length // 30 + 1))[:length]
+    else:
+        limit = size or 255
+        generate = lambda n: f"{name} {n} O'Reilly"[:limit]
+    if nullable:
+        return lambda n: None if n % 10 == 9 else generate(n)
+    return generate
+
+
+class FakeTableDef:
+    def __init__(self, name, fields, rows, primary_key=None):
+        self.Name = name
+        self.Fields = FakeCollection(fields)
+        self.Indexes = FakeCollection([FakeIndex("PrimaryKey", [primary_key], True)] if primary_key else [])
+        self.primary_key = primary_key
+        self.rows = rows
+
+    @property
+    def RecordCount(self):
+        return len(self.rows)
+
+
+class FakeQueryDef:
+    """
+    Query with an optional PARAMETERS declaration, e.g. "PARAMETERS [lo_key] Long; SELECT ..."
+    """
+    declaration = re.compile(r"^\s*PARAMETERS\s+(.*?);(.*)$", re.I | re.S)
+
+    def __init__(self, db, sql):
+        self.db = db
+        self.SQL = sql
+        self.Parameters = FakeCollection()
+        match = self.declaration.match(sql)
+        if match:
+            for parameter in match.group(1).split(","):
+                self.Parameters.append(FakeField(parameter.split("]")[0].strip(" [")))
+
+    def OpenRecordset(self, *args):
+        match = self.declaration.match(self.SQL)
+        sql = match.group(2) if match else self.SQL
+        return self.db.OpenRecordset(sql, *args, parameters={p.Name: p.Value for p in self.Parameters})
+
+
+class FakeDatabase:
+    """
+    Database built from a spec, see the module description
+    """
+    select = re.compile(r"^\s*SELECT\s+(?:TOP\s+(\d+)\s+)?(.*?)\s+FROM\s+(\[[^\]]+\]|\w+)(.*)$", re.I | re.S)
+    clauses = re.compile(r"^\s*(?:WHERE\s+(.*?))?\s*(?:ORDER\s+BY\s+(.*?))?\s*;?\s*$", re.I | re.S)
+    function = re.compile(r"^\s*(COUNT|MIN|MAX)\((\*|\[?\w+\]?)\)(?:\s+AS\s+\[?(\w+)\]?)?\s*$", re.I)
+    condition = re.compile(r"\s*(?:AND\s+)?\(*\s*(?:(\[?\w+\]?)\s+BETWEEN\s+([^\s)]+)\s+AND\s+([^\s)]+)"
+                           r"|(\[?\w+\]?)\s*(>=|<=|<>|=|>|<)\s*('(?:[^']|'')*'|[^\s)]+))\s*\)*\s*", re.I)
+
+    def __init__(self, spec, name=""):
+        self.Name = name
+        self.TableDefs = FakeCollection()
+        tables = {table["name"]: table for table in spec.get("tables", [])}
+        references = {}
+        relationship_rows = []
+        for relation in spec.get("relationships", []):
+            for i, (column, ref_column) in enumerate(zip(relation["columns"], relation["ref_columns"])):
+                relationship_rows.append((relation["name"], relation["table"], column, relation["ref_table"],
+                                          ref_column, i, len(relation["columns"]), 0))
+                references[(relation["table"], column)] = tables[relation["ref_table"]].get("rows", 0)
+        for table in tables.values():
+            fields = table.get("fields", [])
+            primary_key = table.get("primary_key")
+            generators = [value_generator(field, references.get((table["name"], field["name"])),
+                                          field["name"] == primary_key) for field in fields]
+            self.TableDefs.append(FakeTableDef(
+                table["name"],
+                [FakeField(field["name"], None, field.get("type", 10), field.get("size", 0),
+                           field.get("required", False) or field["name"] == primary_key) for field in fields],
+                GeneratedRows(generators, table.get("rows", 0)),
+                primary_key))
+        self.TableDefs.append(FakeTableDef("MSysObjects", [FakeField("Name")], [("MSysObjects",)]))
+        self.TableDefs.append(FakeTableDef("MSysRelationships", [FakeField(name) for name in RELATIONSHIP_FIELDS],
+                                           sorted(relationship_rows, key=lambda row: (row[0], row[5]))))
+
+    def OpenRecordset(self, sql, *args, parameters=None):
+        match = self.select.match(sql)
+        if not match:
+            raise ValueError(f"Unsupported query: {sql}")
+        top, columns, table_name, tail = match.groups()
+        clauses = self.clauses.match(tail)
+        if not clauses:
+            raise ValueError(f"Unsupported query: {sql}")
+        where, order = clauses.groups()
+        table = self.TableDefs(table_name.strip("[]"))
+        names = [field.Name for field in table.Fields]
+        rows = table.rows
+        if where:
+            rows = self.filter(rows, names, table.primary_key, self.conditions(where, parameters or {}))
+        if order:
+            keys = [names.index(column.strip().strip("[]")) for column in order.split(",")]
+            if keys != [names.index(table.primary_key) if table.primary_key else None]:
+                rows = sorted(rows, key=lambda row: tuple((row[i] is not None, row[i]) for i in keys))
+        if "(" in columns:
+            return self.aggregate(rows, names, table.primary_key, columns)
+        if columns.strip() != "*":
+            selected = [column.strip().strip("[]") for column in columns.split(",")]
+            rows = ProjectedRows(rows, [names.index(column) for column in selected])
+            names = selected
+        if top:
+            rows = rows[:int(top)]
+        return FakeRecordset(names, rows)
+
+    def aggregate(self, rows, names, primary_key, columns):
+        """
+        Single row of COUNT(*), MIN([col]) and MAX([col]) values
+        """
+        result_names = []
+        values = []
+        for column in columns.split(","):
+            match = self.function.match(column)
+            if not match:
+                raise ValueError(f"Unsupported aggregate: {column}")
+            function, argument, alias = match.groups()
+            function = function.upper()
+            result_names.append(alias or f"Expr{len(result_names) + 1000}")
+            if function == "COUNT":
+                values.append(len(rows))
+                continue
+            index = names.index(argument.strip("[]"))
+            if argument.strip("[]") == primary_key:
+                value = (rows[-1] if function == "MAX" else rows[0])[index] if len(rows) else None
+            else:
+                present = [row[index] for row in rows if row[index] is not None]
+                value = (max if function == "MAX" else min)(present) if present else None
+            values.append(value)
+        return FakeRecordset(result_names, [tuple(values)])
+
+    def conditions(self, where, parameters):
+        """
+        Parses a conjunction of simple comparisons: [col] BETWEEN a AND b, [col] > a, ...
+        Parentheses are ignored, they do not change a conjunction.
+        """
+        conditions = []
+        position = 0
+        while position < len(where):
+            match = self.condition.match(where, position)
+            if not match:
+                raise ValueError(f"Unsupported condition: {where}")
+            column, low, high, column_cmp, operator, value = match.groups()
+            if column:
+                conditions.append((column.strip("[]"), "between",
+                                   (self.literal(low, parameters), self.literal(high, parameters))))
+            else:
+                conditions.append((column_cmp.strip("[]"), operator, self.literal(value, parameters)))
+            position = match.end()
+        return conditions
+
+    @staticmethod
+    def literal(text, parameters):
+        if text.startswith("["):
+            return parameters[text.strip("[]")]
+        if text.startswith("'"):
+            return text[1:-1].replace("''", "'")
+        return float(text) if "." in text else int(text)
+
+    @staticmethod
+    def filter(rows, names, primary_key, conditions):
+        """
+        Conditions on the primary key narrow the key ordered rows by bisection, the others are scanned
+        """
+        start, stop = 0, len(rows)
+        scan = []
+        for column, operator, value in conditions:
+            index = names.index(column)
+            if column != primary_key or operator == "<>":
+                scan.append((index, operator, value))
+                continue
+            key = lambda row: row[index]
+            low, high = value if operator == "between" else (value, value)
+            if operator in ("between", ">=", "=", ">"):
+                bisect = bisect_right if operator == ">" else bisect_left
+                start = max(start, bisect(rows, low, start, stop, key=key))
+            if operator in ("between", "<=", "=", "<"):
+                bisect = bisect_left if operator == "<" else bisect_right
+                stop = min(stop, bisect(rows, high, start, stop, key=key))
+        rows = SlicedRows(rows, start, stop)
+        if not scan:
+            return rows
+        return [row for row in rows if all(row[index] is not None and COMPARISONS[operator](row[index], value)
+                                           for index, operator, value in scan)]
+
+    def CreateQueryDef(self, name, sql):
+        return FakeQueryDef(self, sql)
+
+    def Close(self):
+        pass
+
+
+class FakeDBEngine:
+    def OpenDatabase(self, path, *args):
+        with open(path, "r") as f:
+            return FakeDatabase(json.load(f), path)
+
+
+def synthetic_spec(tables=10, rows=1000, columns=8, types=DEFAULT_TYPE_MIX, fk_depth=2, blob_size=256):
+    """
+    Spec of a generated database: tables T0001, T0002, ... with an ID primary key and columns cycling through types.
+    Tables form chains of fk_depth relationships, every table references the previous one
+    unless it starts a new chain.
+    :param columns: Columns besides the primary and the foreign key
+    :param types: DAO type codes of the columns
+    :param blob_size: Length of the Binary, Long Binary and Memo values
+    """
+    spec = {"tables": [], "relationships": []}
+    for i in range(tables):
+        name = f"T{i + 1:04d}"
+        fields = [{"name": "ID", "type": 4}]
+        if fk_depth and i % (fk_depth + 1):
+            parent = f"T{i:04d}"
+            fields.append({"name": "ParentID", "type": 4})
+            spec["relationships"].append({"name": f"{parent}{name}", "table": name, "columns": ["ParentID"],
+                                          "ref_table": parent, "ref_columns": ["ID"]})
+        for c in range(columns):
+            field_type = types[c % len(types)]
+            field = {"name": f"C{c + 1:02d}", "type": field_type}
+            if field_type == 10:
+                field["size"] = 50
+            elif field_type in (9, 11, 12):
+                field["blob_size"] = blob_size
+            fields.append(field)
+        spec["tables"].append({"name": name, "rows": rows, "primary_key": "ID", "fields": fields})
+    return spec
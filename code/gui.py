@@ -0,0 +1,417 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import webbrowser
+from tkextras import *
+import json
+import queue
+import threading
+from logger_cfg import logger
+from engine import ExportEngine, SchemaAccessError, output_sql_name, schema_cache_path
+from progress import Progress, ExportCancelled
+
+POLL_MS = 100
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class GetWidgetsFrame(WidgetsRender, ttk.Frame):
+    """
+    The main class of the program is responsible for constructing the form and interaction of elements
+    """
+
+    def __init__(self, render_params=None, *args, **options):
+        """
+        Initialization of the Frame, description of the main elements
+        :param render_params: General parameters for the arrangement of elements can be set externally
+        :param args:
+        :param options:
+        """
+        super().__init__(*args, **options)
+        self.engine = ExportEngine()
+        self.db_path = tk.StringVar(self, "")
+        self.sql_path = tk.StringVar(self, "")
+        self.log_path = tk.StringVar(self, "")
+        self.lable_frame = ttk.Frame(self, padding=(2, 2))
+        self.label_db_path = ttk.Label(self.lable_frame, text="MS Access database", font=("Helvetica", 12),
+                                       wraplength=650)
+        self.label_sql_path = ttk.Label(self.lable_frame, text="Exported SQL script:", font=("Helvetica", 12),
+                                        wraplength=650)
+        self.log_frame = ttk.Frame(self, borderwidth=1, relief="solid", padding=(2, 2))
+        self.label_log_path = ttk.Label(self.log_frame, text="...", font=("Helvetica", 12), wraplength=650)
+        self.frame0 = ttk.Frame(self, width=240, borderwidth=1, relief="solid", padding=(2, 2))
+        self.frame1 = ttk.Frame(self, width=100, borderwidth=1, relief="solid", padding=(2, 2))
+        self.tree = TreeviewDataFrame(self.frame1, columns=("table", "export", "data"), show="headings")
+        self.tree.bind("<<TreeFilterUpdated>>", self.on_filter_updated)
+        self.tree.bind("<<TreeCheckAllUpdated>>", self.on_check_all_updated)
+        self.tree.bind("<<TreeToggleCell>>", self.on_toggle_cell)
+        self.scrollbar = ttk.Scrollbar(self.frame1, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.button_run = tk.Button(self, text=" Run! ", command=self.btn_run, font=("Helvetica", 12, "bold"))
+        self.button_cancel = tk.Button(self, text=" Cancel ", command=self.btn_cancel, font=("Helvetica", 11),
+                                       state="disabled")
+        self.progress_bar = ttk.Progressbar(self, orient="horizontal", length=600, mode="determinate")
+        self.label_progress = ttk.Label(self, text="", font=("Helvetica", 10))
+        self.progress = None
+        self.export_path = ""
+        self.events = queue.Queue()
+        self.create_widgets()
+        self.load_config('config.json', True)
+
+    def create_widgets(self):
+        """
+        Building the main widgets at the beginning of program execution
+        Returns:
+
+        """
+        grid = self.rgrid
+        grid(self)
+        grid(tk.Label(self, text="MS Access to SQL Export Tool", font=("Helvetica", 14)),
+             dict(row=0, column=0, columnspan=3, pady=5))
+        grid(self.lable_frame, dict(row=1, column=0, columnspan=3))
+        grid(self.label_db_path, dict(row=0, column=0, columnspan=3, pady=5))
+        grid(self.label_sql_path, dict(row=1, column=0, columnspan=3, pady=5))
+        grid(tk.Button(self, text="MS Access File Open", command=self.btn_openf, font=("Helvetica", 11)),
+             dict(row=2, column=0))
+        grid(tk.Button(self, text="Save SQL script as...", command=self.btn_sql_path, font=("Helvetica", 11)),
+             dict(row=2, column=1))
+        grid(tk.Button(self, text=" Exit ", command=self.btn_exit, font=("Helvetica", 11)),
+             dict(row=2, column=2, columnspan=2))
+        grid(self.frame1, dict(row=4, column=0, columnspan=3))
+        grid(self.tree, dict(row=0, column=0, pady=5))
+        grid(self.scrollbar, dict(row=0, column=3, sticky="ns"))
+        grid(tk.Button(self, text=" Save default config ", command=self.save_config, font=("Helvetica", 11)),
+             dict(row=5, column=0, ))
+        grid(tk.Button(self, text=" Save config as... ", command=self.save_config_as, font=("Helvetica", 11)),
+             dict(row=5, column=1, ))
+        grid(tk.Button(self, text=" Load config ", command=self.load_config, font=("Helvetica", 11)),
+             dict(row=5, column=2, ))
+        grid(self.log_frame, dict(row=6, column=0, columnspan=3, pady=5))
+        self.log_frame.grid_columnconfigure(1, weight=1)
+        grid(tk.Button(self.log_frame, text=" Logging in file: ", command=self.btn_log, font=("Helvetica", 11)),
+             dict(row=0, column=0, pady=5))
+        grid(self.label_log_path, dict(row=0, column=1, pady=5))
+        grid(tk.Button(self.log_frame, text="X", command=self.btn_log_delete, font=("Helvetica", 11)),
+             dict(row=0, column=2, padx=5, pady=5, sticky="e"))
+        grid(self.button_run, dict(row=7, column=0, columnspan=2, pady=5))
+        grid(self.button_cancel, dict(row=7, column=2, pady=5))
+        grid(self.progress_bar, dict(row=8, column=0, columnspan=3, pady=2))
+        grid(self.label_progress, dict(row=9, column=0, columnspan=3, pady=2))
+
+    def recreate_widgets(self):
+        grid = self.rgrid
+        grid(self.tree, dict(row=0, column=0, pady=5))
+        grid(self.scrollbar, dict(row=0, column=3, sticky="ns"))
+        grid(self.frame0, dict(row=3, column=0, columnspan=3, sticky="e"))
+        grid(self.tree.filter_widget(self.frame0), dict(row=0, column=0, columnspan=3, padx=5, pady=5, sticky="ew"))
+        grid(self.tree.checkbox_widget(self.frame0), dict(row=4, column=0, columnspan=3, padx=5, pady=5, sticky="e"))
+
+    def make_tree(self):
+        self.tree.heading("table", text="Table")
+        self.tree.heading("export", text="Export Table")
+        self.tree.heading("data", text="Upload Data")
+        self.tree.column("table", width=150, anchor="w")
+        self.tree.column("export", width=50, anchor="center")
+        self.tree.column("data", width=50, anchor="center")
+        for tab_name in self.engine.introspect():
+            self.tree.insert("", "end", values=(tab_name, " ", " "))
+        self.tree.grid(row=3, column=0, columnspan=3, pady=5)
+        style = ttk.Style()
+        style.map("Treeview",
+                  background=[("disabled", "#c0c0c0"), ("selected", "#d9f2d9")],
+                  foreground=[("selected", "#000000")]
+                  )
+        style.configure("Treeview", rowheight=25)
+        self.tree.tag_configure("normal")
+        self.tree.tag_configure("selected", background="#fff0f0")
+
+    def update_column_style(self):
+        """..."""
+        for item_id in self.tree.get_children():
+            if "✔" in self.tree.item(item_id, "values"):
+                self.tree.item(item_id, tags=("selected",))
+            else:
+                self.tree.item(item_id, tags=("normal",))
+
+    def on_filter_updated(self, event):
+        """
+
+        Args:
+            event:
+
+        Returns:
+
+        """
+        pass
+
+    def on_check_all_updated(self, event):
+        self.update_column_style()
+
+    def on_toggle_cell(self, event):
+        """Handles cell clicks to change flags."""
+        self.update_column_style()
+
+    def btn_log(self):
+        log_path = filedialog.asksaveasfilename(
+            filetypes=[("Log files", "*.log")],
+            initialfile="export-msaccess-sql.log"
+        )
+        self.log_path.set(log_path)
+        self.update_label_log()
+
+    def btn_log_delete(self):
+        self.log_path.set("")
+        self.update_label_log()
+
+    def btn_run(self):
+        """
+        Implementation of the "Run" button
+        """
+        self.export()
+
+    def btn_cancel(self):
+        """
+        Implementation of the "Cancel" button, the export stops before its next block of rows
+        """
+        if self.progress is not None:
+            self.progress.cancel()
+            self.label_progress['text'] = "Cancelling..."
+
+    def btn_exit(self):
+        master = self.master
+        self.destroy()
+        master.destroy()
+
+    def btn_openf(self):
+        """
+        Implementation of the "File Open" button
+        After selecting a file, the data can be loaded.
+        """
+        db_path = filedialog.askopenfilename(filetypes=[("MS Access files", "*.mdb, *.accdb")])
+        self.db_path.set(db_path)
+        self.update_label_db()
+
+    def btn_sql_path(self):
+        sql_path = filedialog.asksaveasfilename(
+            filetypes=[("SQL script files", "*.sql")],
+            initialfile=output_sql_name(self.db_path.get())
+        )
+        self.sql_path.set(sql_path)
+        self.update_label_sql()
+
+    def save_config(self, file_path='config.json'):
+        self.engine.sql_path = self.sql_path.get()
+        self.engine.log_path = self.log_path.get()
+        config = self.engine.config()
+        config["tree"] = self.tree.df.to_dict()
+        with open(file_path, 'w') as f:
+            json.dump(config, f, indent=4)
+        self.engine.save_schema(schema_cache_path(file_path))
+
+    def save_config_as(self):
+        file_path = filedialog.asksaveasfilename(
+            title="Save configuration as(",
+            defaultextension=".json",
+            initialfile="config.json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if file_path:
+            self.save_config(file_path)
+
+    def load_config(self, fpath='config.json', loadbyinit=False):
+
+        try:
+            config = self.engine.load_config(fpath)
+            self.db_path.set(config["db_path"])
+            self.sql_path.set(config["sql_path"])
+            if "log_path" in config:
+                self.log_path.set(config["log_path"])
+            self.update_widgets()
+            self.tree.df = self.tree.df.from_dict(config["tree"])
+            self.tree.rebuild_tree()
+            self.tree.all_checked_update()
+            return True
+        except:
+            if loadbyinit:
+                return
+            fpath = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+            if fpath:
+                self.load_config(fpath)
+
+    def update_label_db(self):
+        if self.db_connect() and self.check_permissions():
+            self.label_db_path['text'] = f"MS Access database: \"{self.db_path.get().split('/')[-1]}\""
+            self.make_tree()
+            self.recreate_widgets()
+
+    def update_label_sql(self):
+        self.label_sql_path['text'] = f"Exported SQL script: {self.sql_path.get()}"
+
+    def update_label_log(self):
+        self.label_log_path['text'] = f"{self.log_path.get()}"
+
+    def update_widgets(self):
+        self.update_label_db()
+        self.update_label_sql()
+        self.update_label_log()
+
+    def show_permission_warning(self):
+        def open_link(event):
+            warning_window.destroy()
+            webbrowser.open_new(
+                "https://github.com/whellcome/MSAccessToSQL?tab=readme-ov-file#important-note-access-permissions")
+
+        warning_window = tk.Toplevel()
+        warning_window.title("Access Permission Error")
+        warning_window.geometry("345x185")
+        warning_window.resizable(False, False)
+        spad = 7
+        grid = self.rgrid
+        grid(ttk.Label(warning_window, text="Access Permission Error", font=("Helvetica", 14)),
+             dict(row=0, column=0, pady=spad, columnspan=3, sticky="ns"))
+        message = (
+            "The MS Access Export Tool requires access to system tables "
+            "MSysObjects and MSysRelationships. Please refer to the "
+            "documentation for steps to grant the necessary permissions."
+        )
+        grid(ttk.Label(warning_window, text=message, wraplength=350, justify="center"),
+             dict(row=1, column=0, columnspan=3, pady=spad))
+        link = ttk.Label(
+            warning_window, text="Click here for documentation", foreground="blue", cursor="hand2"
+        )
+        grid(link, dict(row=2, column=0, columnspan=3, pady=spad, sticky="ns"))
+        link.bind("<Button-1>", open_link)
+        grid(tk.Button(warning_window, text=" Close ", command=warning_window.destroy),
+             dict(row=3, column=1, pady=spad))
+        warning_window.transient()
+        warning_window.grab_set()
+        warning_window.mainloop()
+
+    def db_connect(self):
+        db_path = self.db_path.get()
+        if not db_path:
+            return None
+        self.engine.open(db_path)
+        return True
+
+    def check_permissions(self):
+        try:
+            self.engine.introspect()
+            return True
+        except SchemaAccessError:
+            self.show_permission_warning()
+        except Exception as e:
+            messagebox.showerror("MS Access database", f"OpenDatabase({self.db_path.get()}) failed: {e}")
+        return False
+
+    def export_prepare(self, output_sql_path=""):
+        df = self.tree.df
+        export_list = df[df.iloc[:, 1] == "✔"]["table"].to_list()
+        upload_list = df[df.iloc[:, 2] == "✔"]["table"].to_list()
+        final_list, added_tables, cyclic_tables = self.engine.resolve(export_list)
+
+        if added_tables:
+            added_tables_str = "\n".join(added_tables)
+            message = (
+                "The following tables were added to ensure database integrity:\n\n"
+                f"{added_tables_str}\n\n"
+                "Do you want to continue the export?"
+            )
+            if not messagebox.askyesno("Integrity Check", message):
+                return False
+
+        if cyclic_tables:
+            cyclic_tables_str = ", ".join(cyclic_tables)
+            messagebox.showwarning("Integrity Check",
+                                   "Circular references were found, these tables are exported "
+                                   f"without dependency ordering among themselves:\n\n{cyclic_tables_str}")
+
+        if not output_sql_path:
+            output_sql_path = output_sql_name(self.db_path.get())
+
+        return final_list, upload_list, output_sql_path
+
+    def export(self):
+        """
+        Starts the export on a worker thread, the window stays responsive.
+        The worker runs on a copy of the engine with its own DAO connection and reports through the event queue.
+        """
+        export_lists = self.export_prepare(self.sql_path.get())
+        if not export_lists:
+            return
+        engine = self.engine.copy()
+        self.export_path = export_lists[2]
+        self.progress = engine.progress = Progress(lambda snapshot: self.events.put(("progress", snapshot)))
+        self.button_run['state'] = "disabled"
+        self.button_cancel['state'] = "normal"
+        self.progress_bar['value'] = 0
+        self.label_progress['text'] = "Export started..."
+        threading.Thread(target=self.export_worker, args=(engine, export_lists), daemon=True).start()
+        self.after(POLL_MS, self.poll_export)
+
+    def export_worker(self, engine, export_lists):
+        """
+        Body of the worker thread, it does not touch the widgets
+        """
+        try:
+            self.events.put(("done", engine.export(*export_lists)))
+        except ExportCancelled:
+            logger.warning("Export cancelled.")
+            self.events.put(("cancelled", None))
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+            self.events.put(("failed", str(e)))
+        finally:
+            engine.close()
+
+    def poll_export(self):
+        while True:
+            try:
+                event, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event == "progress":
+                self.show_progress(value)
+            else:
+                self.export_finished(event, value)
+                return
+        self.after(POLL_MS, self.poll_export)
+
+    def show_progress(self, snapshot):
+        total_rows = snapshot["total_rows"]
+        if total_rows is None:
+            rows = f"{snapshot['rows']:,} rows"
+        else:
+            self.progress_bar['maximum'] = max(total_rows, 1)
+            self.progress_bar['value'] = snapshot["rows"]
+            rows = f"{snapshot['rows']:,} of {total_rows:,} rows"
+        self.label_progress['text'] = (f"{snapshot['table']}: {rows}, "
+                                       f"{snapshot['rows_per_sec']:,.0f} rows/s, "
+                                       f"elapsed {format_duration(snapshot['elapsed'])}, "
+                                       f"ETA {format_duration(snapshot['eta'])}")
+
+    def export_finished(self, event, value):
+        self.show_progress(self.progress.snapshot())
+        self.progress = None
+        self.button_run['state'] = "normal"
+        self.button_cancel['state'] = "disabled"
+        if event == "done":
+            self.progress_bar['value'] = self.progress_bar['maximum']
+            messagebox.showinfo("SQL export completed!", f"File saved as {self.export_path}")
+        elif event == "cancelled":
+            self.label_progress['text'] += " - cancelled"
+            messagebox.showwarning("SQL export cancelled", "The export was cancelled, the output is incomplete.")
+        else:
+            messagebox.showerror("SQL export failed", value)
+
+
+def run():
+    root = tk.Tk()
+    root.title("MS Access Export")
+    app = GetWidgetsFrame(master=root, padding=(2, 2))
+    app.mainloop()
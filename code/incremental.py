@@ -0,0 +1,104 @@
+"""
+Incremental (delta) export.
+A state file next to the SQL script keeps a fingerprint of every exported table:
+row count, highest primary key and, optionally, the highest value of a watermark column (e.g. a modification date).
+On the next run unchanged tables are skipped, append-only tables get only the rows above the stored
+primary key, other changed tables (and the tables referencing them) are emptied with DELETE and reloaded.
+Tables exported before without data are created already and get their rows only.
+The rows read are bounded by the highest primary key of the fingerprint: rows inserted while the export runs
+stay above the stored key and go into the next delta.
+"""
+import json
+import os
+from logger_cfg import logger
+from exporter import (key_json, primary_key, where_clause, ACTION_FULL, ACTION_SKIP, ACTION_APPEND, ACTION_RELOAD,
+                      ACTION_LOAD)
+
+
+def state_path(sql_path):
+    return f"{os.path.splitext(sql_path)[0]}.state.json"
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("tables", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, tables):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"tables": tables}, f, indent=4)
+
+
+def table_fingerprint(db, table, watermark=None):
+    """
+    Row count, highest primary key and highest watermark value of a table, read with one aggregate query
+    """
+    key_field = primary_key(table)
+    columns = ["COUNT(*) AS row_count"]
+    if key_field is not None:
+        columns.append(f"MAX([{key_field.Name}]) AS high_water")
+    if watermark:
+        columns.append(f"MAX([{watermark}]) AS watermark")
+    recordset = db.OpenRecordset(f"SELECT {', '.join(columns)} FROM [{table.Name}] {where_clause(table)}")
+    fingerprint = {
+        "rows": recordset.Fields("row_count").Value,
+        "high_water": key_json(recordset.Fields("high_water").Value) if key_field is not None else None,
+        "watermark": key_json(recordset.Fields("watermark").Value) if watermark else None
+    }
+    recordset.Close()
+    return fingerprint
+
+
+def plan_delta(db, schema, relationships, tables, upload, state, options):
+    """
+    Decides what to export for each table.
+    Tables referencing a reloaded table are reloaded as well, their rows would block the DELETE otherwise:
+    also the tables exported without data this time, if an earlier run exported their rows.
+    A table exported without data keeps the fingerprint of its last export with data, if any.
+    :param tables: Tables in dependency order
+    :param state: Fingerprints of the previous run, see load_state
+    :return: (actions by table: (action, after_key, up_to_key, planned rows), fingerprints of this run)
+    """
+    actions = {}
+    fingerprints = {}
+    append_only = set(options["append_only"])
+    for tab_name in tables:
+        previous = state.get(tab_name)
+        parent_reloaded = any(actions.get(ref_table, (None,))[0] == ACTION_RELOAD
+                              for ref_table in relationships.referenced_tables(tab_name) - {tab_name})
+        if tab_name not in upload and not (parent_reloaded and previous and "rows" in previous):
+            fingerprints[tab_name] = previous or {"structure": True}
+            actions[tab_name] = (ACTION_SKIP if previous else ACTION_FULL, None, None, None)
+            continue
+        current = table_fingerprint(db, schema.tables[tab_name], options["watermarks"].get(tab_name))
+        fingerprints[tab_name] = current
+        up_to_key = current["high_water"]
+        if not previous:
+            actions[tab_name] = (ACTION_FULL, None, up_to_key, current["rows"])
+        elif "rows" not in previous:
+            actions[tab_name] = (ACTION_LOAD, None, up_to_key, current["rows"])
+        elif previous == current:
+            actions[tab_name] = (ACTION_SKIP, None, None, 0)
+        elif (tab_name in append_only and previous["high_water"] is not None
+              and current["rows"] >= previous["rows"]):
+            actions[tab_name] = (ACTION_APPEND, previous["high_water"], up_to_key, current["rows"] - previous["rows"])
+        else:
+            actions[tab_name] = (ACTION_RELOAD, None, up_to_key, current["rows"])
+        if parent_reloaded:
+            actions[tab_name] = (ACTION_RELOAD, None, up_to_key, current["rows"])
+            if tab_name not in upload:
+                logger.warning(f"Table {tab_name} is exported without data but references a reloaded table, "
+                               f"its rows are reloaded as well.")
+        logger.info(f"Table {tab_name}: {actions[tab_name][0]}.")
+    return actions, fingerprints
+
+
+def reloaded_tables(tables, actions):
+    """
+    Tables to empty before the delta, children before parents
+    """
+    return [tab_name for tab_name in reversed(tables) if actions.get(tab_name, (None,))[0] == ACTION_RELOAD]
+
@@ -0,0 +1,209 @@
+"""
+Direct load of the export into a DB-API connection, without an intermediate SQL script.
+Tables are created from the schema snapshot, rows go from the GetRows blocks to executemany
+with parameter binding, each export unit is loaded in one transaction.
+SQLite from the standard library is the reference target. The default PRAGMA settings (WAL journal,
+synchronous NORMAL) keep the database consistent when the load is killed, so it can be resumed;
+a MEMORY or OFF journal is faster but a crash in the middle of a transaction can corrupt the database.
+"""
+import sqlite3
+from logger_cfg import logger
+from encoders import column_formats, TEXT_FORMATS
+from row_reader import open_row_reader
+from exporter import open_rows, open_range, primary_key
+
+SQLITE_TYPES = {
+    "Boolean": "INTEGER",
+    "Byte": "INTEGER",
+    "Integer": "INTEGER",
+    "Long": "INTEGER",
+    "Currency": "NUMERIC",
+    "Single": "REAL",
+    "Double": "REAL",
+    "Date": "TEXT",
+    "Binary": "BLOB",
+    "Text": "TEXT"
+}
+
+DEFAULT_LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL"
+}
+CRASH_SAFE_JOURNALS = ("delete", "truncate", "persist", "wal")
+
+
+def crash_safe(pragmas):
+    """
+    A load with these PRAGMA settings killed or interrupted by a reboot leaves the database as of its last commit
+    """
+    journal_mode = str(pragmas.get("journal_mode", "delete")).lower()
+    synchronous = str(pragmas.get("synchronous", "full")).lower()
+    return journal_mode in CRASH_SAFE_JOURNALS and synchronous not in ("off", "0")
+
+
+# Values the drivers cannot bind are passed in their text form
+CONVERTERS = {type_name: TEXT_FORMATS[type_name] for type_name in ("Date", "Currency")}
+
+
+def build_row_converter(field_types, dao_types, converters=CONVERTERS):
+    """
+    Converts the values the target driver cannot bind, rows are passed through when no column needs it
+    :return: row function, None if no conversion is needed
+    """
+    columns = [(i, converter) for i, converter in enumerate(column_formats(field_types, dao_types, converters))
+               if converter is not None]
+    if not columns:
+        return None
+
+    def convert(row):
+        row = list(row)
+        for i, converter in columns:
+            if row[i] is not None:
+                row[i] = converter(row[i])
+        return row
+
+    return convert
+
+
+class DbApiLoader:
+    """
+    Loads tables into a DB-API 2.0 connection
+    """
+
+    def __init__(self, connection, types, placeholder="?", converters=CONVERTERS):
+        """
+        :param types: Target column types by DAO type name
+        :param placeholder: Parameter marker of the driver paramstyle, "?" or "%s"
+        """
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.types = types
+        self.placeholder = placeholder
+        self.converters = converters
+
+    @staticmethod
+    def quote(name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def create_table(self, table, relationships, dao_types):
+        """
+        Replaces the table with an empty one
+        """
+        quote = self.quote
+        column_definitions = [
+            f"{quote(field.Name)} {self.types.get(dao_types.get(field.Type), 'TEXT')}"
+            f"{' NOT NULL' if field.Required else ''}"
+            for field in table.Fields]
+        key_columns = [field.Name for index in table.Indexes if index.Primary for field in index.Fields]
+        if key_columns:
+            column_definitions.append(f"PRIMARY KEY ({', '.join(map(quote, key_columns))})")
+        for fk in relationships.foreign_keys(table.Name):
+            column_definitions.append(f"FOREIGN KEY ({', '.join(map(quote, fk.columns))}) "
+                                      f"REFERENCES {quote(fk.ref_table)} ({', '.join(map(quote, fk.ref_columns))})")
+        self.cursor.execute(f"DROP TABLE IF EXISTS {quote(table.Name)}")
+        self.cursor.execute(f"CREATE TABLE {quote(table.Name)} ({', '.join(column_definitions)})")
+
+    def delete_rows(self, tab_name):
+        self.cursor.execute(f"DELETE FROM {self.quote(tab_name)}")
+
+    def insert_rows(self, table, reader, dao_types):
+        """
+        Inserts the row blocks of a reader with one executemany call per block
+        :return: number of inserted rows
+        """
+        columns = [field.Name for field in table.Fields]
+        statement = (f"INSERT INTO {self.quote(table.Name)} ({', '.join(map(self.quote, columns))}) "
+                     f"VALUES ({', '.join([self.placeholder] * len(columns))})")
+        convert = build_row_converter([field.Type for field in table.Fields], dao_types, self.converters)
+        row_count = 0
+        for rows in reader.batches():
+            self.cursor.executemany(statement, rows if convert is None else list(map(convert, rows)))
+            row_count += len(rows)
+        return row_count
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def close(self):
+        self.cursor.close()
+        self.connection.close()
+
+
+class SqliteLoader(DbApiLoader):
+    """
+    Loads into a SQLite database file. The PRAGMA settings are relaxed for the load and restored on close.
+    """
+
+    def __init__(self, path, pragmas=None):
+        super().__init__(sqlite3.connect(path), SQLITE_TYPES)
+        self.pragmas = DEFAULT_LOAD_PRAGMAS if pragmas is None else pragmas
+        self.saved_pragmas = {}
+        for name, value in self.pragmas.items():
+            self.saved_pragmas[name] = self.connection.execute(f"PRAGMA {name}").fetchone()[0]
+            self.connection.execute(f"PRAGMA {name} = {value}")
+
+    def close(self):
+        for name, value in self.saved_pragmas.items():
+            self.connection.execute(f"PRAGMA {name} = {value}")
+        super().close()
+
+
+def load_unit(loader, db, unit, schema, relationships, options, dao_types):
+    """
+    Loads one export unit and commits it
+    :return: number of loaded rows
+    """
+    table = schema.tables[unit.tab_name]
+    if unit.structure and not unit.part:
+        logger.info(f"Create table: {table.Name}.")
+        loader.create_table(table, relationships, dao_types)
+    row_count = 0
+    if unit.with_data:
+        if unit.part is None:
+            recordset = open_rows(db, table, unit.after_key, unit.up_to_key)
+            logger.info(f"Load data into: {table.Name}.")
+        else:
+            recordset = open_range(db, table, primary_key(table), unit.low, unit.high)
+            logger.info(f"Load data into: {table.Name}, range {unit.part + 1}.")
+        reader = open_row_reader(recordset, options["fetch_rows"], progress=options.get("progress"))
+        row_count = loader.insert_rows(table, reader, dao_types)
+        reader.close()
+    loader.commit()
+    if unit.last:
+        logger.info(f"Table {table.Name} load complete.")
+    return row_count
+
+
+def load_units(loader, db, units, schema, relationships, options, dao_types, checkpoint=None, metrics=None,
+               progress=None):
+    """
+    Sequential load of the planned units, an interrupted unit is rolled back
+    :param checkpoint: Checkpoint updated after every unit, see checkpoint.Checkpoint
+    :param metrics: Metrics collecting a sample of every unit, the inserts and commits are timed as writes,
+    see metrics.Metrics
+    :param progress: Progress advanced by every block of rows, see progress.Progress
+    :return: number of loaded rows by table
+    """
+    options = dict(options, progress=progress)
+    if metrics is not None:
+        loader.cursor = metrics.timed_output(loader.cursor)
+        loader.connection = metrics.timed_output(loader.connection)
+    row_counts = {}
+    for unit in units:
+        if progress is not None:
+            progress.start_unit(unit)
+        timer = metrics.timer() if metrics is not None else None
+        try:
+            row_count = load_unit(loader, db, unit, schema, relationships, options, dao_types)
+        except Exception:
+            loader.rollback()
+            raise
+        row_counts[unit.tab_name] = row_counts.get(unit.tab_name, 0) + row_count
+        if checkpoint is not None:
+            checkpoint.unit_done(unit, row_count)
+        if timer is not None:
+            metrics.add(unit.tab_name, timer.stop(row_count))
+    return row_counts
@@ -0,0 +1,249 @@
+"""
+Export metrics: the duration of the export phases and, by table, rows, bytes, rows/sec and DAO calls,
+the time of a table split into row fetch, encoding and write.
+DAO calls are counted and timed by a proxy around the source database, only on request as the proxy slows down
+every call: without it the fetch time is part of the encoding time and the report leaves fetch_seconds
+and dao_calls empty. Writes are timed by a proxy around the output, encoding is the rest of the time of an export unit.
+The report is written next to the output as <target>.metrics.json or <target>.metrics.csv.
+"""
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from types import MethodType
+
+METRICS_JSON = "json"
+METRICS_CSV = "csv"
+DEFAULT_METRICS = METRICS_JSON
+VALUE_TYPES = (str, bytes, bytearray, memoryview, int, float, Decimal, date, datetime, tuple, list, type(None))
+SAMPLE_KEYS = ("rows", "bytes", "seconds", "fetch_seconds", "encode_seconds", "write_seconds", "dao_calls")
+DAO_KEYS = ("fetch_seconds", "dao_calls")
+
+
+def metrics_path(target_path, report_format=DEFAULT_METRICS):
+    return f"{os.path.splitext(target_path)[0]}.metrics.{report_format}"
+
+
+def rows_per_sec(rows, seconds):
+    return round(rows / seconds, 1) if seconds > 0 else None
+
+
+def rounded(sample):
+    return {key: round(value, 6) if isinstance(value, float) else value for key, value in sample.items()}
+
+
+class Counter:
+    """
+    Number and total duration of calls
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def timed(self, function, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.calls += 1
+
+
+class DaoProxy:
+    """
+    DAO object counting and timing every method call and property access,
+    the DAO objects it returns (recordsets, fields, collections) are wrapped as well
+    """
+    __slots__ = ("_target", "_counter")
+
+    def __init__(self, target, counter):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_counter", counter)
+
+    def _wrap(self, value):
+        return value if isinstance(value, VALUE_TYPES) else DaoProxy(value, self._counter)
+
+    def __getattr__(self, name):
+        value = self._counter.timed(getattr, self._target, name)
+        if isinstance(value, MethodType):
+            return lambda *args, **kwargs: self._wrap(self._counter.timed(value, *args, **kwargs))
+        return self._wrap(value)
+
+    def __setattr__(self, name, value):
+        self._counter.timed(setattr, self._target, name, value)
+
+    def __call__(self, *args, **kwargs):
+        return self._wrap(self._counter.timed(self._target, *args, **kwargs))
+
+    def __getitem__(self, key):
+        return self._wrap(self._counter.timed(self._target.__getitem__, key))
+
+    def __iter__(self):
+        iterator = self._counter.timed(iter, self._target)
+        while True:
+            try:
+                item = self._counter.timed(next, iterator)
+            except StopIteration:
+                return
+            yield self._wrap(item)
+
+
+class TimedProxy:
+    """
+    Output (script sink, spool file, DB-API cursor) timing its method calls
+    """
+    __slots__ = ("_target", "_counter")
+
+    def __init__(self, target, counter):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_counter", counter)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if callable(value):
+            return lambda *args, **kwargs: self._counter.timed(value, *args, **kwargs)
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+class UnitTimer:
+    """
+    Measures one export unit from the DAO and output counters
+    """
+
+    def __init__(self, dao, output, sink=None):
+        """
+        :param sink: Output counting the written bytes in `written`, see sinks.OutputSink
+        """
+        self.dao = dao
+        self.output = output
+        self.sink = sink
+        self.started = time.perf_counter()
+        self.dao_calls = dao.calls
+        self.fetch_seconds = dao.seconds
+        self.write_seconds = output.seconds
+        self.written = getattr(sink, "written", 0)
+
+    def stop(self, row_count):
+        """
+        :return: sample of the unit, see SAMPLE_KEYS
+        """
+        seconds = time.perf_counter() - self.started
+        fetch_seconds = self.dao.seconds - self.fetch_seconds
+        write_seconds = self.output.seconds - self.write_seconds
+        return {
+            "rows": row_count,
+            "bytes": getattr(self.sink, "written", 0) - self.written,
+            "seconds": seconds,
+            "fetch_seconds": fetch_seconds,
+            "encode_seconds": max(0.0, seconds - fetch_seconds - write_seconds),
+            "write_seconds": write_seconds,
+            "dao_calls": self.dao.calls - self.dao_calls
+        }
+
+
+class Metrics:
+    """
+    Metrics of an export engine. Phases are timed without the phases nested in them,
+    a repeated phase keeps its last duration.
+    """
+
+    def __init__(self):
+        self.dao = Counter()
+        self.output = Counter()
+        self.phases = {}
+        self.tables = {}
+        self.started = datetime.now()
+        self.nested = []
+        self.dao_counted = False
+
+    @contextmanager
+    def phase(self, name):
+        self.nested.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self.nested.pop()
+            self.phases[name] = elapsed - nested
+            if self.nested:
+                self.nested[-1] += elapsed
+
+    def begin_export(self):
+        self.tables = {}
+        self.started = datetime.now()
+
+    def wrap_database(self, db):
+        self.dao_counted = True
+        return DaoProxy(db, self.dao)
+
+    def timed_output(self, output):
+        return TimedProxy(output, self.output)
+
+    def timer(self, sink=None):
+        return UnitTimer(self.dao, self.output, sink)
+
+    def add(self, tab_name, sample, worker=False):
+        """
+        :param worker: The unit ran in a worker process on its own connection, its DAO calls are added to the total
+        """
+        if worker:
+            self.dao.calls += sample["dao_calls"]
+            self.dao.seconds += sample["fetch_seconds"]
+        table = self.tables.setdefault(tab_name, dict.fromkeys(SAMPLE_KEYS, 0))
+        for key in SAMPLE_KEYS:
+            table[key] += sample[key]
+
+    def totals(self):
+        totals = dict.fromkeys(SAMPLE_KEYS, 0)
+        for table in self.tables.values():
+            for key in SAMPLE_KEYS:
+                totals[key] += table[key]
+        totals["dao_calls"] = self.dao.calls
+        return totals
+
+    def without_dao(self, sample):
+        return sample if self.dao_counted else dict(sample, **dict.fromkeys(DAO_KEYS))
+
+    def report(self, **info):
+        """
+        :param info: Run description (database, target, mode)
+        """
+        tables = {}
+        for tab_name, table in self.tables.items():
+            table = dict(table, rows_per_sec=rows_per_sec(table["rows"], table["seconds"]))
+            tables[tab_name] = rounded(self.without_dao(table))
+        totals = self.totals()
+        totals["rows_per_sec"] = rows_per_sec(totals["rows"], self.phases.get("export", 0))
+        return dict(info, started=self.started.isoformat(timespec="seconds"), phases=rounded(self.phases),
+                    totals=rounded(self.without_dao(totals)), tables=tables)
+
+    def save(self, path, report_format=DEFAULT_METRICS, **info):
+        """
+        Writes the report: JSON, or CSV with one line per phase, per table and the totals
+        :raise ValueError: unknown report format
+        """
+        report = self.report(**info)
+        if report_format == METRICS_JSON:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=4)
+        elif report_format == METRICS_CSV:
+            columns = ["scope", "name", *SAMPLE_KEYS, "rows_per_sec"]
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, columns)
+                writer.writeheader()
+                for name, seconds in report["phases"].items():
+                    writer.writerow({"scope": "phase", "name": name, "seconds": seconds})
+                for tab_name, table in report["tables"].items():
+                    writer.writerow(dict(table, scope="table", name=tab_name))
+                writer.writerow(dict(report["totals"], scope="total", name=""))
+        else:
+            raise ValueError(f"Unknown metrics format: {report_format}")
+        return report
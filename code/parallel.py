@@ -0,0 +1,143 @@
+"""
+Parallel export of the units planned by exporter.plan_units.
+Every worker process opens its own connection to the source database and writes the units
+assigned to it into spool files. The spool files are concatenated in dependency and key order.
+With a progress, the workers send the rows they read to this process and stop at the next block of rows
+when the export is cancelled.
+"""
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait
+import time
+from logger_cfg import logger
+from metrics import Metrics
+from progress import WorkerProgress
+from sources import open_database
+from sql_writer import OUTPUT_BUFFER
+
+POLL_SECONDS = 0.1
+
+_worker = {}
+
+
+def _init_worker(db_path, backend, schema, relationships, options, dao_types, with_metrics=True, cancelled=None,
+                 rows_queue=None):
+    _worker["metrics"] = Metrics() if with_metrics else None
+    _worker["db"] = open_database(db_path, backend)
+    if with_metrics and options["dao_metrics"]:
+        _worker["db"] = _worker["metrics"].wrap_database(_worker["db"])
+    _worker["schema"] = schema
+    _worker["relationships"] = relationships
+    _worker["progress"] = WorkerProgress(cancelled, rows_queue) if cancelled is not None else None
+    _worker["options"] = dict(options, progress=_worker["progress"])
+    _worker["dao_types"] = dao_types
+
+
+def _export_spool(unit, spool_path):
+    """
+    :return: (number of exported rows, metrics sample of the unit or None without metrics)
+    """
+    metrics = _worker["metrics"]
+    progress = _worker["progress"]
+    timer = metrics.timer() if metrics is not None else None
+    try:
+        with open(spool_path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER) as spool_file:
+            output = metrics.timed_output(spool_file) if metrics is not None else spool_file
+            row_count = unit.run(output, _worker["db"], _worker["schema"], _worker["relationships"],
+                                 _worker["options"], _worker["dao_types"])
+    finally:
+        if progress is not None:
+            progress.flush()
+    return row_count, timer.stop(row_count) if timer is not None else None
+
+
+def _drain_rows(rows_queue, progress):
+    while True:
+        try:
+            progress.advance(rows_queue.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _unit_result(future, progress, rows_queue):
+    """
+    Waits for an export unit, the rows read by the workers meanwhile advance the progress
+    :raise ExportCancelled: cancel was requested
+    """
+    if progress is None:
+        return future.result()
+    while True:
+        _drain_rows(rows_queue, progress)
+        progress.check()
+        wait([future], timeout=POLL_SECONDS)
+        if future.done():
+            _drain_rows(rows_queue, progress)
+            return future.result()
+
+
+def export_parallel(sink, db_path, backend, units, schema, relationships, options, dao_types, preamble="",
+                    checkpoint=None, postamble="", metrics=None, progress=None):
+    """
+    Exports units with a pool of worker processes, the largest units are scheduled first.
+    Spool files are appended to the script in order as soon as the preceding units are done.
+    :param sink: Output of the final SQL script, see sinks.OutputSink
+    :param units: Export units in the order of the final script, see exporter.plan_units
+    :param preamble: Text written at the beginning of the script
+    :param checkpoint: Checkpoint updated after every merged unit, see checkpoint.Checkpoint
+    :param postamble: Text written at the end of the script
+    :param metrics: Metrics collecting a sample of every unit: the time in the worker, merging counts as write,
+    see metrics.Metrics
+    :param progress: Progress advanced by the rows read in the workers, a cancel request stops the workers
+    at their next block of rows, see progress.Progress
+    :return: number of exported rows by table
+    """
+    workers = max(1, int(options["workers"]))
+    spool_dir = tempfile.mkdtemp(prefix=".spool-", dir=sink.directory)
+    spool_paths = [os.path.join(spool_dir, f"{i:05d}.sql") for i in range(len(units))]
+    row_counts = {}
+    cancelled = rows_queue = None
+    if progress is not None:
+        cancelled = multiprocessing.Event()
+        rows_queue = multiprocessing.Queue()
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(db_path, backend, schema, relationships, options, dao_types,
+                                           metrics is not None, cancelled, rows_queue)) as pool:
+            schedule = sorted(range(len(units)), key=lambda i: units[i].size, reverse=True)
+            futures = {i: pool.submit(_export_spool, units[i], spool_paths[i]) for i in schedule}
+            sink.write(preamble)
+            if checkpoint is not None:
+                checkpoint.commit(sink)
+            try:
+                for i, unit in enumerate(units):
+                    if progress is not None:
+                        progress.start_unit(unit)
+                    row_count, sample = _unit_result(futures[i], progress, rows_queue)
+                    row_counts[unit.tab_name] = row_counts.get(unit.tab_name, 0) + row_count
+                    started = time.perf_counter()
+                    with open(spool_paths[i], "rb") as spool_file:
+                        for chunk in iter(lambda: spool_file.read(OUTPUT_BUFFER), b""):
+                            sink.write_bytes(chunk)
+                        spool_bytes = spool_file.tell()
+                    os.remove(spool_paths[i])
+                    if checkpoint is not None:
+                        checkpoint.unit_done(unit, row_count, sink)
+                    if metrics is not None:
+                        sample["bytes"] = spool_bytes
+                        merge_seconds = time.perf_counter() - started
+                        sample["write_seconds"] += merge_seconds
+                        sample["seconds"] += merge_seconds
+                        metrics.add(unit.tab_name, sample, worker=True)
+            except BaseException:
+                if cancelled is not None:
+                    cancelled.set()
+                pool.shutdown(cancel_futures=True)
+                raise
+            sink.write(postamble)
+        logger.info(f"Merged {len(units)} spool files into {sink.sql_path}.")
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    return row_counts
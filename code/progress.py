@@ -0,0 +1,115 @@
+"""
+Progress of a running export for a user interface: exported rows against the planned rows, rows/sec and ETA.
+The export reports every block of rows read from the source and checks for a cancel request before the next one,
+a cancelled export stops with ExportCancelled and can be resumed from its checkpoint.
+"""
+import threading
+import time
+
+DEFAULT_NOTIFY_SECONDS = 0.1
+
+
+class ExportCancelled(Exception):
+    """
+    The export was cancelled by the user
+    """
+
+
+class Progress:
+    """
+    Progress shared between the export and the user interface thread
+    """
+
+    def __init__(self, listener=None, notify_seconds=DEFAULT_NOTIFY_SECONDS):
+        """
+        :param listener: Called from the export thread with a snapshot, see snapshot.
+        At most every notify_seconds, and when a table starts.
+        """
+        self.listener = listener
+        self.notify_seconds = notify_seconds
+        self.cancelled = threading.Event()
+        self.total_rows = 0
+        self.rows = 0
+        self.table = ""
+        self.started = time.perf_counter()
+        self.notified = 0.0
+
+    def start(self, units):
+        """
+        :param units: Export units to run, the planned rows are their sizes.
+        The total is unknown (None) when a unit has an unknown size, e.g. a linked table.
+        """
+        sizes = [unit.size for unit in units if unit.with_data]
+        self.total_rows = None if any(size < 0 for size in sizes) else sum(sizes)
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def start_unit(self, unit):
+        if unit.tab_name != self.table:
+            self.table = unit.tab_name
+            self.notify(True)
+
+    def advance(self, row_count):
+        self.rows += row_count
+        self.notify()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        """
+        :raise ExportCancelled: cancel was requested
+        """
+        if self.cancelled.is_set():
+            raise ExportCancelled("Export cancelled")
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        rows_per_sec = self.rows / elapsed if elapsed > 0 else 0.0
+        total_rows = None if self.total_rows is None else max(self.total_rows, self.rows)
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "total_rows": total_rows,
+            "elapsed": elapsed,
+            "rows_per_sec": rows_per_sec,
+            "eta": (total_rows - self.rows) / rows_per_sec if rows_per_sec and total_rows is not None else None
+        }
+
+    def notify(self, force=False):
+        now = time.perf_counter()
+        if self.listener is not None and (force or now - self.notified >= self.notify_seconds):
+            self.notified = now
+            self.listener(self.snapshot())
+
+
+class WorkerProgress:
+    """
+    Progress of the units exported by a worker process: the rows read are sent to the exporting process
+    through a queue, at most every notify_seconds, and the cancel request is shared as a multiprocessing event
+    """
+
+    def __init__(self, cancelled, rows_queue, notify_seconds=DEFAULT_NOTIFY_SECONDS):
+        self.cancelled = cancelled
+        self.rows_queue = rows_queue
+        self.notify_seconds = notify_seconds
+        self.rows = 0
+        self.notified = time.perf_counter()
+
+    def advance(self, row_count):
+        self.rows += row_count
+        if time.perf_counter() - self.notified >= self.notify_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.rows_queue.put(self.rows)
+            self.rows = 0
+        self.notified = time.perf_counter()
+
+    def check(self):
+        """
+        :raise ExportCancelled: cancel was requested
+        """
+        if self.cancelled.is_set():
+            raise ExportCancelled("Export cancelled")
@@ -0,0 +1,172 @@
+"""
+Relationship graph of the database, read once from MSysRelationships.
+Foreign keys are indexed by referencing table (outgoing) and by referenced table (incoming).
+The graph adds the referenced tables to an export (closure) and orders the export so that parents precede
+their children: tables of a reference cycle are grouped as one strongly connected component (Tarjan's algorithm)
+and the components are ordered topologically.
+"""
+from collections import defaultdict
+
+
+class ForeignKey:
+    """
+    One relationship from MSysRelationships, possibly spanning several columns
+    """
+
+    def __init__(self, name, table, ref_table):
+        self.name = name
+        self.table = table
+        self.ref_table = ref_table
+        self.columns = []
+        self.ref_columns = []
+
+    def sql(self):
+        return (f" FOREIGN KEY ({', '.join(self.columns)})"
+                f" REFERENCES {self.ref_table}({', '.join(self.ref_columns)})")
+
+
+class RelationshipGraph:
+    """
+    In-memory index of MSysRelationships.
+    The system table is read once; closure, FK clauses and the CREATE/INSERT order are served from memory.
+    """
+
+    query = """
+        SELECT szRelationship, szObject, szColumn, szReferencedObject, szReferencedColumn, icolumn
+        FROM MSysRelationships
+        ORDER BY szRelationship, icolumn
+        """
+
+    def __init__(self):
+        self.outgoing = defaultdict(list)
+        self.incoming = defaultdict(set)
+
+    @classmethod
+    def load(cls, db):
+        """
+        Bulk read of MSysRelationships
+        :param db: DAO Database
+        :return: RelationshipGraph
+        """
+        graph = cls()
+        relations = {}
+        results = db.OpenRecordset(cls.query)
+        while not results.EOF:
+            name = results.Fields("szRelationship").Value
+            fk = relations.get(name)
+            if fk is None:
+                fk = relations[name] = ForeignKey(name, results.Fields("szObject").Value,
+                                                  results.Fields("szReferencedObject").Value)
+            fk.columns.append(results.Fields("szColumn").Value)
+            fk.ref_columns.append(results.Fields("szReferencedColumn").Value)
+            results.MoveNext()
+        results.Close()
+        for fk in relations.values():
+            graph.add(fk)
+        return graph
+
+    def add(self, fk):
+        self.outgoing[fk.table].append(fk)
+        self.incoming[fk.ref_table].add(fk.table)
+
+    def foreign_keys(self, table_name):
+        return self.outgoing.get(table_name, [])
+
+    def referenced_tables(self, table_name):
+        return {fk.ref_table for fk in self.foreign_keys(table_name)}
+
+    def referencing_tables(self, table_name):
+        return self.incoming.get(table_name, set())
+
+    def closure(self, tables):
+        """
+        Adds every table reachable through foreign keys
+        :param tables: Initial list of tables
+        :return: (all tables, added tables)
+        """
+        export_set = set(tables)
+        stack = list(export_set)
+        added_tables = []
+        while stack:
+            for ref_table in self.referenced_tables(stack.pop()):
+                if ref_table not in export_set:
+                    export_set.add(ref_table)
+                    added_tables.append(ref_table)
+                    stack.append(ref_table)
+        return list(export_set), added_tables
+
+    def components(self, tables):
+        """
+        Strongly connected components of the reference graph (Tarjan), self references are ignored
+        :param tables: Tables of the graph, references to other tables are ignored
+        :return: list of components, each a sorted list of tables
+        """
+        tables = sorted(set(tables))
+        table_set = set(tables)
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root in tables:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(sorted(self.referenced_tables(root) & table_set - {root})))]
+            while work:
+                table, parents = work[-1]
+                parent = next(parents, None)
+                if parent is not None:
+                    if parent not in index:
+                        index[parent] = lowlink[parent] = len(index)
+                        stack.append(parent)
+                        on_stack.add(parent)
+                        work.append((parent, iter(sorted(self.referenced_tables(parent) & table_set - {parent}))))
+                    elif parent in on_stack:
+                        lowlink[table] = min(lowlink[table], index[parent])
+                    continue
+                work.pop()
+                if work:
+                    lowlink[work[-1][0]] = min(lowlink[work[-1][0]], lowlink[table])
+                if lowlink[table] == index[table]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == table:
+                            break
+                    components.append(sorted(component))
+        return components
+
+    def topological_order(self, tables):
+        """
+        Orders tables so that referenced (parent) tables always precede the referencing ones.
+        Self references are ignored. The tables of a cycle cannot be ordered among themselves,
+        each cycle is placed as one group in the order, its tables alphabetically.
+        :param tables: Tables to order
+        :return: (ordered tables, tables in cycles)
+        """
+        components = self.components(tables)
+        group_of = {table: group for group, component in enumerate(components) for table in component}
+        pending = {group: {group_of[parent] for table in component for parent in self.referenced_tables(table)
+                           if parent in group_of} - {group}
+                   for group, component in enumerate(components)}
+        children = defaultdict(set)
+        for group, parents in pending.items():
+            for parent in parents:
+                children[parent].add(group)
+        ready = sorted((components[group][0], group) for group, parents in pending.items() if not parents)
+        order = []
+        while ready:
+            _, group = ready.pop(0)
+            order.extend(components[group])
+            for child in children[group]:
+                pending[child].discard(group)
+                if not pending[child]:
+                    ready.append((components[child][0], child))
+            ready.sort()
+        cyclic = sorted(table for component in components if len(component) > 1 for table in component)
+        return order, cyclic
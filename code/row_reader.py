@@ -0,0 +1,155 @@
+DEFAULT_FETCH_ROWS = 1000
+DEFAULT_CHUNK_BYTES = 64 * 1024
+LARGE_TYPES = (11, 12)
+
+
+class RowReader:
+    """
+    Reads a recordset as blocks of row tuples.
+    Field order follows the order of the recordset fields.
+    """
+
+    def __init__(self, recordset, fetch_rows=DEFAULT_FETCH_ROWS, progress=None):
+        """
+        :param progress: Progress advanced by every block, a cancel request is checked before the next one,
+        see progress.Progress
+        """
+        self.recordset = recordset
+        self.fetch_rows = max(1, int(fetch_rows))
+        self.progress = progress
+
+    def fetch(self):
+        """
+        Reads the next block of rows
+        :return: list of row tuples, empty list at the end of the recordset
+        """
+        raise NotImplementedError
+
+    def batches(self):
+        progress = self.progress
+        while True:
+            if progress is not None:
+                progress.check()
+            rows = self.fetch()
+            if not rows:
+                break
+            if progress is not None:
+                progress.advance(len(rows))
+            yield rows
+
+    def __iter__(self):
+        for rows in self.batches():
+            yield from rows
+
+    def close(self):
+        self.recordset.Close()
+
+
+class GetRowsReader(RowReader):
+    """
+    Bulk reader based on DAO Recordset.GetRows(n).
+    One COM call returns a field-major block which is transposed into rows.
+    """
+
+    def fetch(self):
+        if self.recordset.EOF:
+            return []
+        block = self.recordset.GetRows(self.fetch_rows)
+        if not block:
+            return []
+        return list(zip(*block))
+
+
+class CursorRowReader(RowReader):
+    """
+    Fallback reader walking the recordset with MoveNext, one Fields call per cell
+    """
+
+    def fetch(self):
+        recordset = self.recordset
+        fields = recordset.Fields
+        count = fields.Count
+        rows = []
+        while not recordset.EOF and len(rows) < self.fetch_rows:
+            rows.append(tuple(fields(i).Value for i in range(count)))
+            recordset.MoveNext()
+        return rows
+
+
+class LargeValue:
+    """
+    Memo or Long Binary value of the current record, read in chunks with Field.GetChunk.
+    Valid until the recordset moves to the next record.
+    GetChunk takes the offset and size in bytes but returns characters for a Memo field,
+    so the chunks are counted in bytes against the FieldSize of the value, never by their length.
+    """
+
+    def __init__(self, field, size, chunk_bytes=DEFAULT_CHUNK_BYTES):
+        """
+        :param size: FieldSize of the value, in bytes
+        """
+        self.field = field
+        self.size = size
+        self.chunk_bytes = chunk_bytes
+
+    def chunks(self):
+        offset = 0
+        while offset < self.size:
+            count = min(self.chunk_bytes, self.size - offset)
+            chunk = self.field.GetChunk(offset, count)
+            if not chunk:
+                break
+            yield chunk
+            offset += count
+
+
+class ChunkedRowReader(RowReader):
+    """
+    Reads one record per block. Memo and Long Binary columns are returned as LargeValue objects,
+    so a large value is never held in memory as a whole. A block must be consumed before the next one is read.
+    """
+
+    def __init__(self, recordset, large_columns, chunk_bytes=DEFAULT_CHUNK_BYTES, progress=None):
+        super().__init__(recordset, 1, progress)
+        self.large_columns = set(large_columns)
+        self.chunk_bytes = max(1, int(chunk_bytes))
+        self.started = False
+
+    def fetch(self):
+        recordset = self.recordset
+        if self.started:
+            recordset.MoveNext()
+        self.started = True
+        if recordset.EOF:
+            return []
+        fields = recordset.Fields
+        row = []
+        for i in range(fields.Count):
+            field = fields(i)
+            if i not in self.large_columns:
+                row.append(field.Value)
+                continue
+            size = field.FieldSize()
+            row.append(None if size is None else LargeValue(field, size, self.chunk_bytes))
+        return [tuple(row)]
+
+
+def large_columns(table):
+    """
+    Positions of the Memo and Long Binary columns of a table
+    """
+    return [i for i, field in enumerate(table.Fields) if field.Type in LARGE_TYPES]
+
+
+def open_row_reader(recordset, fetch_rows=DEFAULT_FETCH_ROWS, large=None, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                    progress=None):
+    """
+    Picks the fastest reader supported by the recordset
+    :param large: Positions of the columns read in chunks, see large_columns
+    :param progress: see RowReader
+    """
+    if large:
+        return ChunkedRowReader(recordset, large, chunk_bytes, progress)
+    if hasattr(recordset, "GetRows"):
+        return GetRowsReader(recordset, fetch_rows, progress)
+    return CursorRowReader(recordset, fetch_rows, progress)
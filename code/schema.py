@@ -0,0 +1,187 @@
+"""
+Schema snapshot of an MS Access database: tables, fields, primary keys, row counts and relationships.
+The snapshot objects expose the DAO attribute names used by the exporter (Name, Fields, Indexes, RecordCount),
+so they can stand in for TableDefs. A snapshot is cached in a JSON file and reused while the database file
+fingerprint (size, mtime and a hash of the file header) is unchanged.
+"""
+import hashlib
+import json
+import os
+from relations import ForeignKey, RelationshipGraph
+
+SCHEMA_VERSION = 1
+HEADER_BYTES = 64 * 1024
+
+
+class Collection(list):
+    """
+    DAO-like collection: iterable, indexed by position or by name when called
+    """
+
+    def __call__(self, key):
+        if isinstance(key, int):
+            return self[key]
+        for item in self:
+            if item.Name == key:
+                return item
+        raise KeyError(f"Item not found in this collection: {key}")
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class FieldInfo:
+    def __init__(self, name, type, size=0, required=False):
+        self.Name = name
+        self.Type = type
+        self.Size = size
+        self.Required = required
+
+
+class IndexInfo:
+    def __init__(self, name, fields, primary=False):
+        self.Name = name
+        self.Fields = Collection(FieldInfo(field, None) for field in fields)
+        self.Primary = primary
+
+
+class TableInfo:
+    def __init__(self, name, fields, indexes, record_count, where=None):
+        """
+        :param where: Row filter pushed into the SELECT of the data, Access SQL
+        """
+        self.Name = name
+        self.Fields = Collection(fields)
+        self.Indexes = Collection(indexes)
+        self.RecordCount = record_count
+        self.where = where
+
+    def project(self, columns=None, where=None):
+        """
+        Table restricted to the given columns, the primary key is kept only if all its columns are
+        :raise ValueError: unknown column
+        """
+        if columns is None:
+            return TableInfo(self.Name, list(self.Fields), list(self.Indexes), self.RecordCount, where)
+        names = {field.Name for field in self.Fields}
+        unknown = [column for column in columns if column not in names]
+        if unknown:
+            raise ValueError(f"Unknown columns of table {self.Name}: {', '.join(unknown)}")
+        fields = [field for field in self.Fields if field.Name in columns]
+        indexes = [index for index in self.Indexes if all(field.Name in columns for field in index.Fields)]
+        return TableInfo(self.Name, fields, indexes, self.RecordCount, where)
+
+    @classmethod
+    def from_tabledef(cls, table):
+        fields = [FieldInfo(field.Name, field.Type, field.Size, bool(field.Required)) for field in table.Fields]
+        indexes = [IndexInfo(index.Name, [field.Name for field in index.Fields], True)
+                   for index in table.Indexes if index.Primary]
+        return cls(table.Name, fields, indexes, table.RecordCount)
+
+    def to_dict(self):
+        return {
+            "name": self.Name,
+            "fields": [[field.Name, field.Type, field.Size, field.Required] for field in self.Fields],
+            "primary_keys": {index.Name: [field.Name for field in index.Fields] for index in self.Indexes},
+            "record_count": self.RecordCount
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"],
+                   [FieldInfo(*field) for field in data["fields"]],
+                   [IndexInfo(name, fields, True) for name, fields in data["primary_keys"].items()],
+                   data["record_count"])
+
+
+def fingerprint(db_path):
+    """
+    Cheap identity of the database file: size, modification time and a hash of the file header
+    """
+    stat = os.stat(db_path)
+    with open(db_path, "rb") as f:
+        header = hashlib.sha1(f.read(HEADER_BYTES)).hexdigest()
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "header": header}
+
+
+class SchemaSnapshot:
+    def __init__(self, tables, foreign_keys, fingerprint=None):
+        self.tables = {table.Name: table for table in tables}
+        self.foreign_keys = foreign_keys
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_db(cls, db, db_fingerprint=None):
+        """
+        Reads the schema over DAO: TableDefs with their fields and primary keys, and MSysRelationships
+        """
+        tables = [TableInfo.from_tabledef(table) for table in db.TableDefs if not table.Name.startswith("MSys")]
+        graph = RelationshipGraph.load(db)
+        foreign_keys = [fk for fks in graph.outgoing.values() for fk in fks]
+        return cls(tables, foreign_keys, db_fingerprint)
+
+    def table_names(self):
+        return list(self.tables)
+
+    def project(self, filters):
+        """
+        Snapshot with the per-table column projections and row filters of the configuration.
+        Relationships using a column left out of the projection are dropped.
+        :param filters: {table: {"columns": [...], "where": "..."}}
+        """
+        if not filters:
+            return self
+        tables = []
+        for table in self.tables.values():
+            table_filter = filters.get(table.Name, {})
+            tables.append(table.project(table_filter.get("columns"), table_filter.get("where") or None))
+        columns = {table.Name: {field.Name for field in table.Fields} for table in tables}
+        foreign_keys = [fk for fk in self.foreign_keys
+                        if set(fk.columns) <= columns.get(fk.table, set())
+                        and set(fk.ref_columns) <= columns.get(fk.ref_table, set())]
+        return SchemaSnapshot(tables, foreign_keys, self.fingerprint)
+
+    def relationships(self):
+        graph = RelationshipGraph()
+        for fk in self.foreign_keys:
+            graph.add(fk)
+        return graph
+
+    def to_dict(self):
+        return {
+            "version": SCHEMA_VERSION,
+            "fingerprint": self.fingerprint,
+            "tables": [table.to_dict() for table in self.tables.values()],
+            "relationships": [{"name": fk.name, "table": fk.table, "columns": fk.columns,
+                               "ref_table": fk.ref_table, "ref_columns": fk.ref_columns}
+                              for fk in self.foreign_keys]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        foreign_keys = []
+        for relation in data["relationships"]:
+            fk = ForeignKey(relation["name"], relation["table"], relation["ref_table"])
+            fk.columns = relation["columns"]
+            fk.ref_columns = relation["ref_columns"]
+            foreign_keys.append(fk)
+        return cls([TableInfo.from_dict(table) for table in data["tables"]], foreign_keys, data["fingerprint"])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path, db_fingerprint):
+        """
+        Cached snapshot, None if it is missing, unreadable or made for another state of the database file
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SCHEMA_VERSION or data.get("fingerprint") != db_fingerprint:
+                return None
+            return cls.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
@@ -0,0 +1,175 @@
+"""
+Output sinks of the SQL script: plain, gzip or zstd compressed, in one file or split into parts.
+Text is compressed as it is written. At every checkpoint the compressed stream is closed
+(a gzip member or a zstd frame) and a new one is started with the next write, so the script can be
+cut back to any checkpoint and continued. The parts are split between export units:
+after every table, or once a part has reached split_bytes. A split script has an index file
+<script>.index.json listing the parts and their tables in dependency order.
+"""
+import gzip
+import json
+import os
+from logger_cfg import logger
+from sql_writer import OUTPUT_BUFFER
+
+COMPRESSION_EXTENSIONS = {
+    "": "",
+    "gzip": ".gz",
+    "zstd": ".zst"
+}
+SPLIT_NONE = ""
+SPLIT_TABLE = "table"
+SPLIT_SIZE = "size"
+DEFAULT_SPLIT_BYTES = 1024 * 1024 * 1024
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+def index_path(sql_path):
+    return f"{os.path.splitext(sql_path)[0]}.index.json"
+
+
+def data_dir(sql_path):
+    """
+    Directory of the files written next to the script: columnar files, MySQL data files, large value side files
+    """
+    return f"{os.path.splitext(sql_path)[0]}_data"
+
+
+class OutputSink:
+    """
+    File-like writer of the SQL script
+    """
+
+    def __init__(self, sql_path, compression="", split=SPLIT_NONE, split_bytes=DEFAULT_SPLIT_BYTES,
+                 level=DEFAULT_COMPRESSION_LEVEL, position=None):
+        """
+        :param sql_path: Path of the script, the parts and the compression extension are derived from it
+        :param position: Position returned by commit, the sink continues from it
+        :raise ValueError: unknown compression or split mode
+        """
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if split not in (SPLIT_NONE, SPLIT_TABLE, SPLIT_SIZE):
+            raise ValueError(f"Unknown split mode: {split}")
+        if compression == "zstd":
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("zstd compression needs zstandard: pip install zstandard") from e
+            self.zstd = zstandard.ZstdCompressor(level=level)
+        self.sql_path = sql_path
+        self.directory = os.path.dirname(os.path.abspath(sql_path))
+        self.compression = compression
+        self.split = split
+        self.split_bytes = max(1, int(split_bytes))
+        self.level = level
+        self.raw = None
+        self.stream = None
+        self.parts = []
+        self.rotate = True
+        self.written = 0
+        if position:
+            self.restore(position)
+
+    def part_path(self, number):
+        stem, extension = os.path.splitext(self.sql_path)
+        name = f"{stem}.{number:04d}{extension}" if self.split else self.sql_path
+        return name + COMPRESSION_EXTENSIONS[self.compression]
+
+    def restore(self, position):
+        """
+        Cuts the parts back to a checkpoint position and removes the parts written after it
+        :raise ValueError: a part is shorter than its checkpoint
+        """
+        self.parts = [dict(part) for part in position["parts"]]
+        self.rotate = position["rotate"]
+        for part in self.parts:
+            size = os.path.getsize(part["file"]) if os.path.isfile(part["file"]) else -1
+            if size < part["size"]:
+                raise ValueError(f"The SQL script is shorter than its checkpoint, cannot resume: {part['file']}")
+        if self.parts:
+            last = self.parts[-1]
+            if os.path.getsize(last["file"]) > last["size"]:
+                logger.info(f"Partial output removed: {os.path.getsize(last['file']) - last['size']} bytes.")
+            os.truncate(last["file"], last["size"])
+        self.remove_parts(len(self.parts) + 1)
+        if not self.rotate:
+            self.raw = open(self.parts[-1]["file"], "ab", buffering=OUTPUT_BUFFER)
+
+    def remove_parts(self, number):
+        """
+        Removes the part files of an earlier, longer export from number on
+        """
+        if not self.split:
+            return
+        while os.path.isfile(self.part_path(number)):
+            os.remove(self.part_path(number))
+            number += 1
+
+    def open_stream(self):
+        if self.raw is None:
+            path = self.part_path(len(self.parts) + 1)
+            self.raw = open(path, "wb", buffering=OUTPUT_BUFFER)
+            self.parts.append({"file": path, "tables": [], "size": 0})
+            self.rotate = False
+        if self.compression == "gzip":
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=self.level)
+        elif self.compression == "zstd":
+            self.stream = self.zstd.stream_writer(self.raw, closefd=False)
+        else:
+            self.stream = self.raw
+
+    def end_stream(self):
+        if self.stream is not None and self.stream is not self.raw:
+            self.stream.close()
+        self.stream = None
+
+    def write(self, text):
+        self.write_bytes(text.encode("utf-8"))
+
+    def write_bytes(self, data):
+        if not data:
+            return
+        if self.stream is None:
+            self.open_stream()
+        self.stream.write(data)
+        self.written += len(data)
+
+    def commit(self, unit=None):
+        """
+        Makes the output durable up to here and starts a new part when the split mode asks for it
+        :param unit: Export unit completed at this point
+        :return: position to continue from, JSON serialisable
+        """
+        self.end_stream()
+        if self.raw is not None:
+            self.raw.flush()
+            os.fsync(self.raw.fileno())
+            part = self.parts[-1]
+            part["size"] = self.raw.tell()
+            if unit is not None and unit.tab_name not in part["tables"]:
+                part["tables"].append(unit.tab_name)
+            if unit is not None and ((self.split == SPLIT_TABLE and unit.last)
+                                     or (self.split == SPLIT_SIZE and part["size"] >= self.split_bytes)):
+                self.raw.close()
+                self.raw = None
+                self.rotate = True
+        return {"parts": [dict(part) for part in self.parts], "rotate": self.rotate}
+
+    def close(self):
+        if not self.parts:
+            self.open_stream()
+        self.end_stream()
+        if self.raw is not None:
+            self.raw.close()
+            self.raw = None
+        if self.split:
+            self.remove_parts(len(self.parts) + 1)
+            with open(index_path(self.sql_path), "w", encoding="utf-8") as f:
+                json.dump({"parts": [{"file": os.path.basename(part["file"]), "tables": part["tables"]}
+                                     for part in self.parts]}, f, indent=4)
+
+
+def open_sink(sql_path, options, position=None):
+    return OutputSink(sql_path, options["compression"], options["split"], options["split_bytes"],
+                      options["compression_level"], position)
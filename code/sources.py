@@ -0,0 +1,50 @@
+"""
+Source database backends.
+"dao" opens MS Access files through DAO.DBEngine.120, "fake" opens a JSON spec with the pure-Python fake_dao backend.
+"""
+
+DEFAULT_BACKEND = "dao"
+
+
+def open_dao(db_path):
+    import pythoncom
+    import win32com.client
+    pythoncom.CoInitialize()
+    engine = win32com.client.Dispatch("DAO.DBEngine.120")
+    return engine.OpenDatabase(db_path)
+
+
+def release_dao():
+    import pythoncom
+    pythoncom.CoUninitialize()
+
+
+def open_fake(db_path):
+    from fake_dao import FakeDBEngine
+    return FakeDBEngine().OpenDatabase(db_path)
+
+
+BACKENDS = {
+    "dao": open_dao,
+    "fake": open_fake,
+}
+
+
+def open_database(db_path, backend=DEFAULT_BACKEND):
+    """
+    Opens the source database
+    :param db_path: Path to the database file
+    :param backend: Backend name, see BACKENDS
+    :return: DAO Database or a compatible object
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown source backend: {backend}")
+    return BACKENDS[backend](db_path)
+
+
+def release_backend(backend=DEFAULT_BACKEND):
+    """
+    Releases the backend in the calling thread once its databases are closed
+    """
+    if backend == "dao":
+        release_dao()
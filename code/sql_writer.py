@@ -0,0 +1,64 @@
+DEFAULT_BATCH_ROWS = 500
+DEFAULT_BATCH_BYTES = 1024 * 1024
+DEFAULT_COMMIT_EVERY = 0
+OUTPUT_BUFFER = 1024 * 1024
+
+
+class InsertWriter:
+    """
+    Groups rows into multi-row INSERT statements.
+    A statement is closed when it reaches batch_rows rows or batch_bytes characters,
+    each statement is sent to the file with a single write.
+    With commit_every > 0 every commit_every statements are wrapped into BEGIN/COMMIT.
+    """
+
+    def __init__(self, sql_file, table_name, columns, batch_rows=DEFAULT_BATCH_ROWS,
+                 batch_bytes=DEFAULT_BATCH_BYTES, commit_every=DEFAULT_COMMIT_EVERY):
+        self.sql_file = sql_file
+        self.header = f"INSERT INTO '{table_name}' ({', '.join(columns)}) VALUES\n"
+        self.batch_rows = max(1, int(batch_rows))
+        self.batch_bytes = max(1, int(batch_bytes))
+        self.commit_every = max(0, int(commit_every))
+        self.rows = []
+        self.size = len(self.header)
+        self.statements = 0
+        self.row_count = 0
+        self.in_transaction = False
+
+    def add(self, values):
+        """
+        Adds a row of SQL literals
+        """
+        row = f" ({', '.join(values)})"
+        if self.rows and self.size + len(row) + 3 > self.batch_bytes:
+            self.flush()
+        self.rows.append(row)
+        self.size += len(row) + 2
+        self.row_count += 1
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def add_rows(self, rows):
+        for values in rows:
+            self.add(values)
+
+    def flush(self):
+        if not self.rows:
+            return
+        statement = self.header + ",\n".join(self.rows) + ";\n"
+        if self.commit_every and not self.in_transaction:
+            statement = "BEGIN;\n" + statement
+            self.in_transaction = True
+        self.statements += 1
+        if self.commit_every and self.statements % self.commit_every == 0:
+            statement += "COMMIT;\n"
+            self.in_transaction = False
+        self.sql_file.write(statement)
+        self.rows = []
+        self.size = len(self.header)
+
+    def close(self):
+        self.flush()
+        if self.in_transaction:
+            self.sql_file.write("COMMIT;\n")
+            self.in_transaction = False
@@ -0,0 +1,21 @@
+"""
+The tests run the export pipeline on the fake DAO backend (fake_dao), no Windows or MS Access needed.
+The modules of the application are flat files in code/, the shared helpers are in helpers.py.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "code"))
+
+from fake_dao import synthetic_spec  # noqa: E402
+from helpers import write_spec  # noqa: E402
+
+
+@pytest.fixture
+def fake_db(tmp_path):
+    """
+    Four tables of 500 rows: T0001 <- T0002 <- T0003 and T0004
+    """
+    return write_spec(tmp_path / "db.json", synthetic_spec(tables=4, rows=500, columns=4))
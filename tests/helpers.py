@@ -0,0 +1,51 @@
+"""
+Helpers of the tests running the export pipeline on the fake DAO backend
+"""
+import json
+
+from engine import ExportEngine
+
+# Exported tables of the fake_db fixture, T0001 and T0002 are added as the parents of T0003
+TABLES = ["T0003", "T0004"]
+
+
+def write_spec(path, spec):
+    with open(path, "w") as f:
+        json.dump(spec, f)
+    return str(path)
+
+
+def export(db_path, output_path, export_list=TABLES, resume=False, progress=None, upload=None, **options):
+    """
+    Exports tables on the fake backend, the "tables" option holds the per-table filters
+    :param upload: Tables exported with data, all by default
+    :return: (exported rows by table, tables in export order)
+    """
+    engine = ExportEngine(dict({"backend": "fake", "metrics": ""}, **options))
+    engine.open(db_path)
+    engine.resume = resume
+    engine.progress = progress
+    try:
+        ordered, _, _ = engine.resolve(export_list)
+        return engine.export(ordered, ordered if upload is None else upload, str(output_path)), ordered
+    finally:
+        engine.close()
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def value_rows(script):
+    """
+    Rows of the INSERT statements of a script, independent of where the batches break
+    """
+    rows = []
+    for line in script.splitlines():
+        if line.startswith("INSERT INTO ") and ") VALUES (" in line:
+            line = line[line.index(") VALUES (") + len(") VALUES "):]
+        elif not line.startswith(" ("):
+            continue
+        rows.append(line.strip().rstrip(",;"))
+    return rows
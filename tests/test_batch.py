@@ -0,0 +1,89 @@
+import json
+import os
+import queue
+import subprocess
+import time
+from multiprocessing import Process, Queue
+
+import pytest
+
+from batch import BatchJob, STATUS_FAILED, STATUS_OK, STATUS_TIMEOUT, collect_results, run_batch, terminate_tree
+from engine import CHECK_MARK, CONFIG_INFO
+from fake_dao import synthetic_spec
+from helpers import write_spec
+
+
+def write_config(path, db_path, tables, **options):
+    keys = [str(i) for i in range(len(tables))]
+    config = {
+        "info": CONFIG_INFO,
+        "db_path": db_path,
+        "sql_path": f"{os.path.splitext(str(path))[0]}.sql",
+        "options": dict({"backend": "fake", "metrics": ""}, **options),
+        "tree": {"table": dict(zip(keys, tables)), "export": dict.fromkeys(keys, CHECK_MARK),
+                 "data": dict.fromkeys(keys, CHECK_MARK)}
+    }
+    with open(path, "w") as f:
+        json.dump(config, f)
+    return str(path)
+
+
+def test_every_job_has_its_result(fake_db, tmp_path):
+    first = write_config(tmp_path / "first.json", fake_db, ["T0004"])
+    second = write_config(tmp_path / "second.json", fake_db, ["T0003"])
+    summary = run_batch([first, second, first, str(tmp_path / "missing.json")], jobs=3)
+    assert [(job["config"], job["status"], job["rows"]) for job in summary] == [
+        (first, STATUS_OK, 500), (second, STATUS_OK, 500), (first, STATUS_OK, 500),
+        (str(tmp_path / "missing.json"), STATUS_FAILED, 0)]
+
+
+def test_failed_export_is_reported(tmp_path):
+    config = write_config(tmp_path / "config.json", str(tmp_path / "missing.db.json"), ["T0001"])
+    [job] = run_batch([config])
+    assert job["status"] == STATUS_FAILED and job["error"]
+
+
+def test_long_job_is_terminated(tmp_path):
+    db_path = write_spec(tmp_path / "big.json", synthetic_spec(tables=4, rows=500000, columns=8))
+    config = write_config(tmp_path / "config.json", db_path, ["T0003", "T0004"], workers=2)
+    [job] = run_batch([config], timeout=0.5)
+    assert job["status"] == STATUS_TIMEOUT
+    assert job["seconds"] < 5
+
+
+def test_duration_ends_with_the_result():
+    job = BatchJob(0, "config.json")
+    job.started = time.perf_counter() - 2
+    results = queue.Queue()
+    results.put((0, STATUS_OK, {"T1": 3}, ""))
+    collect_results(results, {0: job})
+    time.sleep(0.3)
+    assert job.status == STATUS_OK and job.row_counts == {"T1": 3}
+    assert 2 <= job.seconds < 2.2
+
+
+def _spawn_sleeper(pids):
+    os.setpgrp()
+    pids.put(subprocess.Popen(["sleep", "60"]).pid)
+    time.sleep(60)
+
+
+def running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ")[1][0] != "Z"
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs POSIX process groups and /proc")
+def test_terminate_tree_stops_the_worker_processes():
+    pids = Queue()
+    process = Process(target=_spawn_sleeper, args=(pids,))
+    process.start()
+    worker_pid = pids.get(timeout=10)
+    terminate_tree(process)
+    deadline = time.time() + 5
+    while running(worker_pid) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not process.is_alive() and not running(worker_pid)
@@ -0,0 +1,66 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from checkpoint import Checkpoint, manifest_path
+from exporter import ExportUnit, key_json, key_parameter
+from fake_dao import FakeField
+from helpers import export, read_text
+from progress import Progress, ExportCancelled
+
+
+@pytest.mark.parametrize("value, field_type", [(datetime(2024, 1, 31, 12, 30, 5), 8), (Decimal("19.9900"), 5),
+                                               (42, 4), ("A-17", 10)])
+def test_key_values_round_trip(value, field_type):
+    assert key_parameter(key_json(value), FakeField("ID", type=field_type)) == value
+
+
+def test_manifest_round_trip(tmp_path):
+    path = str(tmp_path / "out.manifest.json")
+    units = [ExportUnit("T1", True, 10, 0, datetime(2024, 1, 1), datetime(2024, 1, 5), False),
+             ExportUnit("T1", True, 5, 1, datetime(2024, 1, 6), datetime(2024, 2, 1))]
+    checkpoint = Checkpoint(path, ["T1"], ["T1"], units)
+    checkpoint.unit_done(units[0], 10)
+    loaded = Checkpoint.load(path, ["T1"], ["T1"])
+    assert loaded.completed == 1 and [unit.part for unit in loaded.pending()] == [1]
+    assert loaded.progress == {"T1": {"rows": 10, "complete": False, "last_key": "2024-01-05 00:00:00"}}
+    with pytest.raises(ValueError):
+        Checkpoint.load(path, ["T1", "T2"], ["T1"])
+    assert Checkpoint.load(str(tmp_path / "missing.json"), ["T1"], ["T1"]) is None
+
+
+@pytest.mark.parametrize("options", [{}, {"partition_rows": 120}])
+def test_resume_after_cancel_equals_clean_export(fake_db, tmp_path, options):
+    export(fake_db, tmp_path / "clean.sql", **options)
+    output = tmp_path / "resumed.sql"
+
+    def cancel_midway(snapshot):
+        if snapshot["rows"] >= 700:
+            progress.cancel()
+
+    progress = Progress(cancel_midway, notify_seconds=0)
+    with pytest.raises(ExportCancelled):
+        export(fake_db, output, progress=progress, **options)
+    assert os.path.exists(manifest_path(str(output)))
+    export(fake_db, output, resume=True, **options)
+    assert read_text(output) == read_text(tmp_path / "clean.sql")
+    assert not os.path.exists(manifest_path(str(output)))
+
+
+def test_resume_with_other_output_options_is_refused(fake_db, tmp_path):
+    export(fake_db, tmp_path / "clean.sql", partition_rows=120)
+    output = tmp_path / "resumed.sql"
+
+    def cancel_midway(snapshot):
+        if snapshot["rows"] >= 700:
+            progress.cancel()
+
+    progress = Progress(cancel_midway, notify_seconds=0)
+    with pytest.raises(ExportCancelled):
+        export(fake_db, output, progress=progress, partition_rows=120)
+    with pytest.raises(ValueError, match="other compression, dialect options"):
+        export(fake_db, output, resume=True, partition_rows=120, dialect="postgresql", compression="gzip")
+    export(fake_db, output, resume=True, partition_rows=120)
+    assert read_text(output) == read_text(tmp_path / "clean.sql")
@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+import uuid
+from decimal import Decimal
+
+import pytest
+
+import columnar
+from columnar import CsvTableWriter, ParquetTableWriter
+from engine import DAO_TYPES
+from fake_dao import FakeField, FakeTableDef, synthetic_spec
+from helpers import export, write_spec
+
+
+def test_csv_files_with_schema_sidecars(fake_db, tmp_path):
+    row_counts, ordered = export(fake_db, tmp_path / "out.sql", columnar="csv",
+                                 data_dir=str(tmp_path / "data"))
+    assert row_counts == {table: 500 for table in ordered}
+    for table in ordered:
+        with open(tmp_path / "data" / f"{table}.csv", newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        with open(tmp_path / "data" / f"{table}.schema.json", encoding="utf-8") as f:
+            schema = json.load(f)
+        assert rows[0] == [column["name"] for column in schema["columns"]]
+        assert len(rows) - 1 == schema["rows"] == 500
+    assert sorted(os.listdir(tmp_path / "data")) == sorted(
+        [f"{table}.csv" for table in ordered] + [f"{table}.schema.json" for table in ordered])
+
+
+def test_file_names_stay_in_the_data_directory(tmp_path):
+    spec = synthetic_spec(tables=1, rows=10, columns=4)
+    spec["tables"][0]["name"] = "../Order Details"
+    write_spec(tmp_path / "db.json", spec)
+    row_counts, _ = export(tmp_path / "db.json", tmp_path / "out.sql", ["../Order Details"], columnar="csv",
+                           data_dir=str(tmp_path / "data"))
+    assert row_counts == {"../Order Details": 10}
+    assert sorted(os.listdir(tmp_path / "data")) == ["_._Order_Details.csv", "_._Order_Details.schema.json"]
+    with open(tmp_path / "data" / "_._Order_Details.schema.json", encoding="utf-8") as f:
+        assert json.load(f)["table"] == "../Order Details"
+
+
+def test_failed_write_closes_the_recordset(fake_db, tmp_path, monkeypatch):
+    closed = []
+    open_rows = columnar.open_rows
+
+    def tracked_rows(db, table):
+        recordset = open_rows(db, table)
+        recordset.Close = lambda: closed.append(table.Name)
+        return recordset
+
+    def failing_rows(self, rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(columnar, "open_rows", tracked_rows)
+    monkeypatch.setattr(CsvTableWriter, "add_rows", failing_rows)
+    with pytest.raises(OSError):
+        export(fake_db, tmp_path / "out.sql", ["T0001"], columnar="csv", data_dir=str(tmp_path / "data"))
+    assert closed == ["T0001"]
+    assert os.listdir(tmp_path / "data") == []
+
+
+def test_parquet_types_and_fallback_to_strings(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    fields = [FakeField("ID", type=4, required=True), FakeField("Price", type=5), FakeField("Amount", type=20),
+              FakeField("Guid", type=15)]
+    table = FakeTableDef("Items", fields, [], "ID")
+    path = str(tmp_path / "Items.parquet")
+    writer = ParquetTableWriter(path, table, DAO_TYPES, {"row_group_rows": 2, "parquet_compression": "snappy"})
+    guid = uuid.UUID(int=1)
+    writer.add_rows([(1, Decimal("1.5"), Decimal("12345678901234567890.12"), guid), (2, None, None, None),
+                     (3, 7, 3, "{0}")])
+    writer.close()
+    result = pq.read_table(path)
+    assert [str(field.type) for field in result.schema] == ["int32", "decimal128(19, 4)", "string", "string"]
+    assert result.num_rows == 3 and pq.ParquetFile(path).num_row_groups == 2
+    assert result.schema.metadata == {b"table": b"Items"}
+    assert result.column("Amount").to_pylist() == ["12345678901234567890.12", None, "3"]
+    assert result.column("Guid").to_pylist() == [str(guid), None, "{0}"]
@@ -0,0 +1,54 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from dialects import DIALECTS, LargeValueNames
+from engine import DAO_TYPES
+from fake_dao import FakeField, FakeTableDef
+from helpers import export, read_text
+
+TABLE = FakeTableDef("Items", [FakeField("ID", type=4), FakeField("Active", type=1), FakeField("Price", type=5),
+                               FakeField("Created", type=8), FakeField("Name", type=10), FakeField("Data", type=11)],
+                     [], "ID")
+ROW = (1, True, Decimal("2.50"), datetime(2024, 1, 31, 12, 30, 5, 1000), "a\tb\nc\\d\re\0f", b"\x00\xab")
+
+
+def test_copy_line_escaping():
+    encode = DIALECTS["postgresql"].row_encoder(TABLE, DAO_TYPES)
+    assert encode(ROW) == "1\tt\t2.50\t2024-01-31 12:30:05\ta\\tb\\nc\\\\d\\re\0f\t\\\\x00AB\n"
+    assert encode((2, None, None, None, None, None)) == "2\t\\N\t\\N\t\\N\t\\N\t\\N\n"
+
+
+def test_load_data_line_escaping():
+    encode = DIALECTS["mysql"].row_encoder(TABLE, DAO_TYPES)
+    assert encode(ROW) == "1\t1\t2.50\t2024-01-31 12:30:05\ta\\tb\\nc\\\\d\\re\\0f\t00AB\n"
+
+
+@pytest.mark.parametrize("name, expected", [("Items", "Items.tsv"), ("A/B", "A_B.tsv"), ("..\\x:y?", "_._x_y_.tsv"),
+                                            ("../../etc", "_._.._etc.tsv")])
+def test_data_files_stay_in_the_data_directory(tmp_path, name, expected):
+    path = DIALECTS["mysql"].data_path(FakeTableDef(name, [], []), {"data_dir": str(tmp_path)}, None)
+    assert path == os.path.join(str(tmp_path), expected)
+
+
+def test_large_value_names_stay_in_the_data_directory():
+    names = LargeValueNames(FakeTableDef("../Items", [FakeField("ID", type=10)], [], "ID"), None)
+    assert names.name(("../x",), 0, FakeField("Da/ta")) == os.path.join("_._Items", "_._x.Da_ta")
+
+
+def test_postgresql_script_loads_data_before_keys(fake_db, tmp_path):
+    export(fake_db, tmp_path / "out.sql", dialect="postgresql")
+    script = read_text(tmp_path / "out.sql")
+    assert script.count("FROM STDIN;\n") == script.count("\n\\.\n") == 4
+    assert script.index('COPY "T0004"') < script.index("-- Keys\n") < script.index('ADD CONSTRAINT')
+    assert 'CREATE TABLE "T0001" (\n "ID" integer NOT NULL' in script
+
+
+def test_mysql_script_loads_the_data_files(fake_db, tmp_path):
+    export(fake_db, tmp_path / "out.sql", dialect="mysql", data_dir=str(tmp_path / "data"))
+    script = read_text(tmp_path / "out.sql")
+    assert sorted(os.listdir(tmp_path / "data")) == [f"T000{i}.tsv" for i in range(1, 5)]
+    assert script.count("LOAD DATA LOCAL INFILE") == 4
+    assert len(read_text(tmp_path / "data" / "T0002.tsv").splitlines()) == 500
@@ -0,0 +1,33 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from encoders import build_encoders, build_row_encoder
+from engine import DAO_TYPES
+
+FIELD_TYPES = [1, 2, 4, 5, 6, 7, 8, 10, 11, 12, 15]
+ROW = (True, 255, -42, Decimal("19.9900"), 0.5, 1 / 3, datetime(2024, 1, 31, 12, 30, 5, 250000), "O'Neil",
+       b"\x00\xffA", "line 1\nline 2", "{00000000-0000-0000-0000-000000000001}")
+
+
+def test_row_encoder_literals():
+    assert build_row_encoder(FIELD_TYPES, DAO_TYPES)(ROW) == [
+        "TRUE", "255", "-42", "19.9900", "0.5", "0.3333333333333333", "'2024-01-31 12:30:05'", "'O''Neil'",
+        "X'00FF41'", "'line 1\nline 2'", "'{00000000-0000-0000-0000-000000000001}'"]
+
+
+@pytest.mark.parametrize("row", [ROW, (None,) * len(FIELD_TYPES)])
+def test_row_encoder_equals_column_encoders(row):
+    encoders = build_encoders(FIELD_TYPES, DAO_TYPES)
+    assert build_row_encoder(FIELD_TYPES, DAO_TYPES)(row) == [encode(value) for encode, value in zip(encoders, row)]
+
+
+def test_nulls_and_empty_tables():
+    assert build_row_encoder(FIELD_TYPES, DAO_TYPES)((None,) * len(FIELD_TYPES)) == ["NULL"] * len(FIELD_TYPES)
+    assert build_row_encoder([], DAO_TYPES)(()) == []
+
+
+def test_unknown_types_fall_back_to_the_value_type():
+    encode = build_row_encoder([20, 20, 20, 20], DAO_TYPES)
+    assert encode((Decimal("1.5"), False, b"\x01", "it's")) == ["1.5", "FALSE", "X'01'", "'it''s'"]
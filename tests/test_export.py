@@ -0,0 +1,14 @@
+import os
+
+from checkpoint import manifest_path
+from helpers import export, read_text
+
+
+def test_export_order_and_counts(fake_db, tmp_path):
+    row_counts, ordered = export(fake_db, tmp_path / "out.sql")
+    assert ordered == ["T0001", "T0002", "T0003", "T0004"]
+    assert row_counts == {table: 500 for table in ordered}
+    script = read_text(tmp_path / "out.sql")
+    assert script.index("CREATE TABLE 'T0001'") < script.index("CREATE TABLE 'T0002'")
+    assert not os.path.exists(manifest_path(str(tmp_path / "out.sql")))
+
@@ -0,0 +1,31 @@
+import pytest
+
+from helpers import export, read_text, value_rows
+
+
+def test_columns_are_projected(fake_db, tmp_path):
+    export(fake_db, tmp_path / "out.sql", tables={"T0004": {"columns": ["ID", "C02"]}})
+    script = read_text(tmp_path / "out.sql")
+    table = script[script.index("CREATE TABLE 'T0004'"):]
+    assert "'C01'" not in table and "'C02'" in table
+    assert "INSERT INTO 'T0004' (ID, C02) VALUES" in table
+
+
+def test_rows_are_filtered_in_the_source_query(fake_db, tmp_path):
+    row_counts, _ = export(fake_db, tmp_path / "out.sql",
+                           tables={"T0004": {"where": "ID > 450"}, "T0001": {"where": "ID <= 10"}},
+                           partition_rows=20)
+    assert row_counts == {"T0001": 10, "T0002": 500, "T0003": 500, "T0004": 50}
+    rows = value_rows(read_text(tmp_path / "out.sql"))
+    assert [int(row[1:].split(",")[0]) for row in rows[-50:]] == list(range(451, 501))
+
+
+def test_relationship_of_a_projected_column_is_dropped(fake_db, tmp_path):
+    _, ordered = export(fake_db, tmp_path / "out.sql", ["T0002"], tables={"T0002": {"columns": ["ID", "C01"]}})
+    assert ordered == ["T0002"]
+    assert "FOREIGN KEY" not in read_text(tmp_path / "out.sql")
+
+
+def test_unknown_column_is_rejected(fake_db, tmp_path):
+    with pytest.raises(ValueError, match="Unknown columns of table T0004: Missing"):
+        export(fake_db, tmp_path / "out.sql", tables={"T0004": {"columns": ["ID", "Missing"]}})
@@ -0,0 +1,84 @@
+import os
+
+from fake_dao import synthetic_spec
+from helpers import export, read_text, value_rows, write_spec
+from incremental import state_path
+
+APPEND_ONLY = ["T0003", "T0004"]
+
+
+def grow(db_path, **rows):
+    spec = synthetic_spec(tables=4, rows=500, columns=4)
+    for table in spec["tables"]:
+        table["rows"] = rows.get(table["name"], 500)
+    write_spec(db_path, spec)
+
+
+def delta(db_path, output, upload=None):
+    row_counts, _ = export(db_path, output, upload=upload, incremental=True, append_only=APPEND_ONLY)
+    return row_counts, read_text(output)
+
+
+def test_unchanged_tables_are_skipped(fake_db, tmp_path):
+    output = tmp_path / "out.sql"
+    row_counts, _ = delta(fake_db, output)
+    assert row_counts == {"T0001": 500, "T0002": 500, "T0003": 500, "T0004": 500}
+    assert os.path.exists(state_path(str(output)))
+    row_counts, script = delta(fake_db, output)
+    assert row_counts == {}
+    assert "INSERT" not in script and "CREATE TABLE" not in script
+
+
+def test_append_only_tables_get_the_new_rows(fake_db, tmp_path):
+    output = tmp_path / "out.sql"
+    delta(fake_db, output)
+    grow(fake_db, T0003=600, T0004=550)
+    row_counts, script = delta(fake_db, output)
+    assert row_counts == {"T0003": 100, "T0004": 50}
+    rows = value_rows(script)
+    assert [int(row[1:].split(",")[0]) for row in rows] == list(range(501, 601)) + list(range(501, 551))
+    assert "CREATE TABLE" not in script and "DELETE" not in script
+
+
+def test_changed_table_is_reloaded_with_the_tables_referencing_it(fake_db, tmp_path):
+    output = tmp_path / "out.sql"
+    delta(fake_db, output)
+    grow(fake_db, T0001=510)
+    row_counts, script = delta(fake_db, output)
+    assert row_counts == {"T0001": 510, "T0002": 500, "T0003": 500}
+    assert script.startswith("-- Delta export\nDELETE FROM 'T0003';\nDELETE FROM 'T0002';\nDELETE FROM 'T0001';\n")
+    assert "CREATE TABLE" not in script
+
+
+def test_table_created_without_data_gets_its_rows_only(fake_db, tmp_path):
+    output = tmp_path / "out.sql"
+    row_counts, script = delta(fake_db, output, upload=["T0003"])
+    assert row_counts == {"T0001": 0, "T0002": 0, "T0003": 500, "T0004": 0}
+    assert script.count("CREATE TABLE") == 4
+    row_counts, script = delta(fake_db, output, upload=["T0001", "T0003"])
+    assert row_counts == {"T0001": 500}
+    assert "CREATE TABLE" not in script and "DELETE" not in script
+
+
+def test_table_exported_without_data_keeps_its_fingerprint(fake_db, tmp_path):
+    output = tmp_path / "out.sql"
+    delta(fake_db, output)
+    grow(fake_db, T0004=520)
+    row_counts, _ = delta(fake_db, output, upload=["T0001", "T0002", "T0003"])
+    assert row_counts == {}
+    row_counts, script = delta(fake_db, output)
+    assert row_counts == {"T0004": 20}
+    assert "CREATE TABLE" not in script
+
+
+def test_rows_exported_before_are_reloaded_with_their_parent(fake_db, tmp_path):
+    output = tmp_path / "out.sql"
+    export(fake_db, output, ["T0003"], upload=["T0001", "T0002", "T0003"], incremental=True)
+    grow(fake_db, T0001=510)
+    row_counts, _ = export(fake_db, output, ["T0003"], upload=["T0001"], incremental=True)
+    assert row_counts == {"T0001": 510, "T0002": 500, "T0003": 500}
+    script = read_text(output)
+    assert script.startswith("-- Delta export\nDELETE FROM 'T0003';\nDELETE FROM 'T0002';\nDELETE FROM 'T0001';\n")
+    assert "CREATE TABLE" not in script
+    row_counts, _ = export(fake_db, output, ["T0003"], upload=["T0001"], incremental=True)
+    assert row_counts == {}
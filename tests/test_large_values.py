@@ -0,0 +1,64 @@
+import filecmp
+import os
+import re
+
+import pytest
+
+from fake_dao import synthetic_spec
+from helpers import export, read_text, value_rows, write_spec
+
+# Memo and Long Binary values of 256 bytes, read in chunks of 50
+LARGE = {"large_values": "inline", "chunk_bytes": 50}
+
+
+@pytest.fixture
+def large_db(tmp_path):
+    return write_spec(tmp_path / "large.json", synthetic_spec(tables=2, rows=30, columns=9))
+
+
+def side_file_literal(match):
+    with open(match.group(2), "rb") as f:
+        value = f.read()
+    if match.group(1):
+        return "'" + value.decode("utf-8").replace("'", "''") + "'"
+    return f"X'{value.hex().upper()}'"
+
+
+def test_inline_values_equal_the_plain_export(large_db, tmp_path):
+    export(large_db, tmp_path / "plain.sql", ["T0002"])
+    export(large_db, tmp_path / "large.sql", ["T0002"], **LARGE)
+    plain, large = read_text(tmp_path / "plain.sql"), read_text(tmp_path / "large.sql")
+    assert len(value_rows(plain)) == 60
+    assert value_rows(large) == value_rows(plain)
+    assert "X'000102" in large and "It''s line text" in large
+
+
+def test_side_files_hold_the_plain_values(large_db, tmp_path):
+    export(large_db, tmp_path / "plain.sql", ["T0002"])
+    export(large_db, tmp_path / "files.sql", ["T0002"], **dict(LARGE, large_values="files"))
+    script = read_text(tmp_path / "files.sql")
+    reference = re.compile(r"(CAST\()?readfile\('([^']*)'\)(?(1) AS TEXT\))")
+    paths = [match.group(2) for match in reference.finditer(script)]
+    data_dir = str(tmp_path / "files_data")
+    assert len(paths) == 108 and all(os.path.dirname(os.path.dirname(path)) == data_dir for path in paths)
+    assert sorted(os.listdir(data_dir)) == ["T0001", "T0002"]
+    assert value_rows(reference.sub(side_file_literal, script)) == value_rows(read_text(tmp_path / "plain.sql"))
+
+
+@pytest.mark.parametrize("dialect", ["postgresql", "mysql"])
+def test_streamed_rows_equal_the_plain_export(large_db, tmp_path, dialect):
+    export(large_db, tmp_path / "plain.sql", ["T0002"], dialect=dialect, data_dir=str(tmp_path / "data"))
+    export(large_db, tmp_path / "large.sql", ["T0002"], dialect=dialect, data_dir=str(tmp_path / "data_large"),
+           **LARGE)
+    plain = read_text(tmp_path / "plain.sql").replace(str(tmp_path / "data"), "")
+    assert read_text(tmp_path / "large.sql").replace(str(tmp_path / "data_large"), "") == plain
+    if dialect == "mysql":
+        files = sorted(os.listdir(tmp_path / "data"))
+        assert files == ["T0001.tsv", "T0002.tsv"]
+        assert filecmp.cmpfiles(tmp_path / "data", tmp_path / "data_large", files, shallow=False)[0] == files
+
+
+@pytest.mark.parametrize("dialect", ["postgresql", "mysql"])
+def test_side_files_are_refused_by_the_target_dialects(large_db, tmp_path, dialect):
+    with pytest.raises(ValueError, match="use large_values inline"):
+        export(large_db, tmp_path / "files.sql", ["T0002"], dialect=dialect, **dict(LARGE, large_values="files"))
@@ -0,0 +1,53 @@
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from engine import DAO_TYPES
+from helpers import export
+from loader import SqliteLoader, build_row_converter, crash_safe
+
+
+def query(path, sql):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+
+
+def test_direct_load_creates_and_fills_the_tables(fake_db, tmp_path):
+    target = str(tmp_path / "target.db")
+    row_counts, ordered = export(fake_db, tmp_path / "out.sql", load_into=target, partition_rows=120)
+    assert row_counts == {table: 500 for table in ordered}
+    assert not (tmp_path / "out.sql").exists()
+    for table in ordered:
+        assert query(target, f"SELECT COUNT(*), MIN(ID), MAX(ID) FROM {table}") == [(500, 1, 500)]
+    assert query(target, "SELECT `table` FROM pragma_foreign_key_list('T0003')") == [("T0002",)]
+
+
+def test_load_pragmas_are_restored_on_close(tmp_path):
+    path = str(tmp_path / "target.db")
+    loader = SqliteLoader(path, {"journal_mode": "MEMORY", "synchronous": "OFF"})
+    assert loader.connection.execute("PRAGMA journal_mode").fetchone() == ("memory",)
+    assert loader.connection.execute("PRAGMA synchronous").fetchone() == (0,)
+    loader.close()
+    assert query(path, "PRAGMA journal_mode") == [("delete",)]
+    loader = SqliteLoader(path)
+    assert loader.connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    loader.close()
+    assert query(path, "PRAGMA journal_mode") == [("delete",)]
+
+
+@pytest.mark.parametrize("pragmas, safe", [({}, True), ({"journal_mode": "WAL", "synchronous": "NORMAL"}, True),
+                                           ({"journal_mode": "MEMORY"}, False), ({"synchronous": "OFF"}, False)])
+def test_crash_safe(pragmas, safe):
+    assert crash_safe(pragmas) == safe
+
+
+def test_row_converter_converts_dates_and_currency_only():
+    assert build_row_converter([4, 10], DAO_TYPES) is None
+    convert = build_row_converter([4, 8, 5], DAO_TYPES)
+    assert convert((1, datetime(2024, 1, 31, 12, 30), Decimal("19.9900"))) == [1, "2024-01-31 12:30:00", "19.9900"]
+    assert convert((1, None, None)) == [1, None, None]
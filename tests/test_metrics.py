@@ -0,0 +1,60 @@
+import csv
+import json
+import os
+
+import pytest
+
+from benchmark import bench_export
+from helpers import export
+from metrics import DaoProxy, metrics_path
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_json_report(fake_db, tmp_path, workers):
+    output = str(tmp_path / "out.sql")
+    export(fake_db, output, metrics="json", dao_metrics=True, workers=workers)
+    with open(metrics_path(output), encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["database"] == fake_db and report["target"] == output
+    assert {"connect", "introspect", "resolve", "plan", "export", "finish"} <= set(report["phases"])
+    assert sorted(report["tables"]) == ["T0001", "T0002", "T0003", "T0004"]
+    assert all(table["rows"] == 500 and table["bytes"] > 0 and table["dao_calls"] > 0
+               for table in report["tables"].values())
+    totals = report["totals"]
+    assert totals["rows"] == 2000 and totals["rows_per_sec"] > 0
+    assert totals["bytes"] == sum(table["bytes"] for table in report["tables"].values()) <= os.path.getsize(output)
+    assert totals["dao_calls"] >= sum(table["dao_calls"] for table in report["tables"].values())
+
+
+def test_csv_report(fake_db, tmp_path):
+    output = str(tmp_path / "out.sql")
+    export(fake_db, output, metrics="csv")
+    with open(metrics_path(output, "csv"), newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["name"] for row in rows if row["scope"] == "table"] == ["T0001", "T0002", "T0003", "T0004"]
+    assert [row["rows"] for row in rows if row["scope"] == "total"] == ["2000"]
+
+
+def test_dao_calls_are_not_counted_by_default(fake_db, tmp_path, monkeypatch):
+    wrapped = []
+    monkeypatch.setattr(DaoProxy, "__init__", lambda *args: wrapped.append(args))
+    output = str(tmp_path / "out.sql")
+    export(fake_db, output, metrics="json")
+    with open(metrics_path(output), encoding="utf-8") as f:
+        report = json.load(f)
+    assert wrapped == []
+    assert report["totals"]["rows"] == 2000 and report["totals"]["encode_seconds"] > 0
+    assert report["totals"]["dao_calls"] is None and report["totals"]["fetch_seconds"] is None
+    assert all(table["dao_calls"] is None for table in report["tables"].values())
+
+
+def test_no_report_without_metrics(fake_db, tmp_path):
+    output = str(tmp_path / "out.sql")
+    export(fake_db, output)
+    assert not os.path.exists(metrics_path(output))
+
+
+def test_benchmark_suite_reports_bytes_and_dao_calls():
+    result = bench_export(2, 50, columns=3, memory=False)
+    assert result["rows"] == 100
+    assert result["bytes"] > 0 and result["dao_calls"] > 0
@@ -0,0 +1,7 @@
+from helpers import export, read_text
+
+
+def test_parallel_export_equals_sequential(fake_db, tmp_path):
+    export(fake_db, tmp_path / "serial.sql")
+    export(fake_db, tmp_path / "parallel.sql", workers=3)
+    assert read_text(tmp_path / "parallel.sql") == read_text(tmp_path / "serial.sql")
@@ -0,0 +1,20 @@
+import pytest
+
+from exporter import key_ranges, primary_key
+from fake_dao import FakeDatabase, synthetic_spec
+from helpers import export, read_text, value_rows
+
+
+def test_key_ranges_cover_the_table():
+    db = FakeDatabase(synthetic_spec(tables=1, rows=250, columns=2))
+    table = db.TableDefs("T0001")
+    ranges = key_ranges(db, table, primary_key(table), {"partition_rows": 100, "fetch_rows": 30})
+    assert ranges == [(1, 100, 100), (101, 200, 100), (201, 250, 50)]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_partitioned_export_has_the_same_rows(fake_db, tmp_path, workers):
+    export(fake_db, tmp_path / "whole.sql")
+    row_counts, _ = export(fake_db, tmp_path / "split.sql", partition_rows=120, workers=workers)
+    assert sum(row_counts.values()) == 2000
+    assert value_rows(read_text(tmp_path / "split.sql")) == value_rows(read_text(tmp_path / "whole.sql"))
@@ -0,0 +1,34 @@
+import pytest
+
+from exporter import ExportUnit, UNKNOWN_SIZE
+from helpers import export
+from progress import Progress, ExportCancelled
+
+
+def test_progress_total_is_the_planned_rows(fake_db, tmp_path):
+    progress = Progress()
+    export(fake_db, tmp_path / "out.sql", progress=progress, partition_rows=120)
+    snapshot = progress.snapshot()
+    assert snapshot["rows"] == snapshot["total_rows"] == 2000
+
+
+def test_total_is_unknown_with_a_linked_table():
+    progress = Progress()
+    progress.start([ExportUnit("T1", True, 100), ExportUnit("T2", True, UNKNOWN_SIZE), ExportUnit("T3", False, 5)])
+    progress.advance(40)
+    assert progress.snapshot()["total_rows"] is None and progress.snapshot()["eta"] is None
+
+
+def test_listener_gets_every_table(fake_db, tmp_path):
+    tables = []
+    progress = Progress(lambda snapshot: tables.append(snapshot["table"]), notify_seconds=3600)
+    export(fake_db, tmp_path / "out.sql", progress=progress)
+    assert tables == ["T0001", "T0002", "T0003", "T0004"]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_cancel_stops_the_export(fake_db, tmp_path, workers):
+    progress = Progress()
+    progress.cancel()
+    with pytest.raises(ExportCancelled):
+        export(fake_db, tmp_path / "out.sql", progress=progress, workers=workers)
@@ -0,0 +1,58 @@
+from fake_dao import FakeDatabase, synthetic_spec
+from relations import ForeignKey, RelationshipGraph
+
+
+def graph(*references):
+    """
+    :param references: (table, referenced table) pairs
+    """
+    result = RelationshipGraph()
+    for table, ref_table in references:
+        fk = ForeignKey(f"{ref_table}{table}", table, ref_table)
+        fk.columns.append(f"{ref_table}ID")
+        fk.ref_columns.append("ID")
+        result.add(fk)
+    return result
+
+
+def test_load_reads_multi_column_relationships():
+    spec = synthetic_spec(tables=3, rows=10, columns=1)
+    spec["relationships"].append({"name": "Pair", "table": "T0003", "columns": ["ID", "C01"],
+                                  "ref_table": "T0001", "ref_columns": ["ID", "C01"]})
+    relationships = RelationshipGraph.load(FakeDatabase(spec))
+    assert relationships.referenced_tables("T0003") == {"T0002", "T0001"}
+    pair = [fk for fk in relationships.foreign_keys("T0003") if fk.name == "Pair"][0]
+    assert (pair.columns, pair.ref_columns) == (["ID", "C01"], ["ID", "C01"])
+
+
+def test_closure_adds_referenced_tables():
+    relationships = graph(("Orders", "Customers"), ("Lines", "Orders"), ("Lines", "Products"))
+    tables, added = relationships.closure(["Lines"])
+    assert sorted(tables) == ["Customers", "Lines", "Orders", "Products"]
+    assert sorted(added) == ["Customers", "Orders", "Products"]
+
+
+def test_parents_precede_children():
+    relationships = graph(("Orders", "Customers"), ("Lines", "Orders"), ("Lines", "Products"),
+                          ("Customers", "Customers"))
+    order, cyclic = relationships.topological_order(["Lines", "Products", "Orders", "Customers"])
+    assert order == ["Customers", "Orders", "Products", "Lines"]
+    assert cyclic == []
+
+
+def test_cycle_is_one_group_after_its_parents():
+    relationships = graph(("A", "B"), ("B", "A"), ("A", "Root"), ("Child", "B"))
+    order, cyclic = relationships.topological_order(["Child", "B", "A", "Root"])
+    assert order == ["Root", "A", "B", "Child"]
+    assert cyclic == ["A", "B"]
+
+
+def test_components_group_the_tables_of_each_cycle():
+    relationships = graph(("A", "B"), ("B", "C"), ("C", "A"), ("D", "E"), ("E", "D"), ("F", "A"), ("F", "F"))
+    assert sorted(relationships.components(["A", "B", "C", "D", "E", "F"])) == [["A", "B", "C"], ["D", "E"], ["F"]]
+
+
+def test_closure_with_a_cycle_terminates():
+    relationships = graph(("A", "B"), ("B", "A"), ("Child", "A"))
+    tables, added = relationships.closure(["Child"])
+    assert sorted(tables) == ["A", "B", "Child"] and sorted(added) == ["A", "B"]
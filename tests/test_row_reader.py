@@ -0,0 +1,28 @@
+from fake_dao import FakeRecordset, FakeField
+from row_reader import GetRowsReader, CursorRowReader, LargeValue, open_row_reader
+
+ROWS = [(i, f"name {i}", None if i % 3 else i * 1.5) for i in range(10)]
+
+
+def test_get_rows_reads_blocks_of_fetch_rows():
+    reader = GetRowsReader(FakeRecordset(["ID", "Name", "Value"], ROWS), fetch_rows=4)
+    assert [len(rows) for rows in reader.batches()] == [4, 4, 2]
+
+
+def test_get_rows_matches_cursor_with_fewer_calls():
+    bulk = FakeRecordset(["ID", "Name", "Value"], ROWS)
+    cursor = FakeRecordset(["ID", "Name", "Value"], ROWS)
+    assert list(GetRowsReader(bulk, fetch_rows=4)) == list(CursorRowReader(cursor, fetch_rows=4)) == ROWS
+    assert bulk.calls < cursor.calls
+
+
+def test_empty_recordset():
+    assert list(open_row_reader(FakeRecordset(["ID"], []))) == []
+
+
+def test_large_value_chunks_cover_field_size():
+    value = bytes(range(256)) * 3
+    for chunk_bytes in (1, 7, 256, 100000):
+        chunks = list(LargeValue(FakeField("Data", value), len(value), chunk_bytes).chunks())
+        assert b"".join(chunks) == value
+        assert max(len(chunk) for chunk in chunks) <= chunk_bytes
@@ -0,0 +1,44 @@
+import os
+
+from engine import ExportEngine
+from fake_dao import synthetic_spec
+from helpers import write_spec
+from schema import SchemaSnapshot, fingerprint
+from sources import open_fake
+
+
+def introspect(db_path, schema_path, refresh=False):
+    engine = ExportEngine({"backend": "fake", "metrics": ""})
+    engine.open(db_path)
+    engine.schema_path = str(schema_path)
+    engine.refresh_schema = refresh
+    try:
+        return engine.introspect(), engine.db is not None
+    finally:
+        engine.close()
+
+
+def test_snapshot_round_trip(fake_db, tmp_path):
+    snapshot = SchemaSnapshot.from_db(open_fake(fake_db), fingerprint(fake_db))
+    snapshot.save(tmp_path / "schema.json")
+    loaded = SchemaSnapshot.load(tmp_path / "schema.json", fingerprint(fake_db))
+    assert loaded.to_dict() == snapshot.to_dict()
+    assert loaded.relationships().referenced_tables("T0003") == {"T0002"}
+
+
+def test_snapshot_of_another_database_state_is_not_loaded(fake_db, tmp_path):
+    SchemaSnapshot.from_db(open_fake(fake_db), fingerprint(fake_db)).save(tmp_path / "schema.json")
+    assert SchemaSnapshot.load(tmp_path / "schema.json", dict(fingerprint(fake_db), size=1)) is None
+    (tmp_path / "broken.json").write_text("{")
+    assert SchemaSnapshot.load(tmp_path / "broken.json", fingerprint(fake_db)) is None
+    assert SchemaSnapshot.load(tmp_path / "missing.json", fingerprint(fake_db)) is None
+
+
+def test_engine_reads_the_cache_until_the_database_changes(fake_db, tmp_path):
+    schema_path = tmp_path / "config.schema.json"
+    assert introspect(fake_db, schema_path) == (["T0001", "T0002", "T0003", "T0004"], True)
+    assert os.path.exists(schema_path)
+    assert introspect(fake_db, schema_path) == (["T0001", "T0002", "T0003", "T0004"], False)
+    assert introspect(fake_db, schema_path, refresh=True)[1]
+    write_spec(fake_db, synthetic_spec(tables=2, rows=10, columns=2))
+    assert introspect(fake_db, schema_path) == (["T0001", "T0002"], True)
@@ -0,0 +1,79 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from helpers import export, read_text
+from progress import Progress, ExportCancelled
+from sinks import OutputSink, index_path
+
+
+def read_parts(sql_path):
+    with open(index_path(sql_path), "r", encoding="utf-8") as f:
+        parts = json.load(f)["parts"]
+    directory = os.path.dirname(sql_path)
+    return parts, [gzip.decompress(open(os.path.join(directory, part["file"]), "rb").read()).decode("utf-8")
+                   for part in parts]
+
+
+def test_gzip_output_equals_plain(fake_db, tmp_path):
+    export(fake_db, tmp_path / "plain.sql")
+    export(fake_db, tmp_path / "packed.sql", compression="gzip")
+    with gzip.open(tmp_path / "packed.sql.gz", "rt", encoding="utf-8") as f:
+        assert f.read() == read_text(tmp_path / "plain.sql")
+
+
+def test_zstd_output_equals_plain(fake_db, tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    export(fake_db, tmp_path / "plain.sql", partition_rows=120)
+    export(fake_db, tmp_path / "packed.sql", compression="zstd", partition_rows=120)
+    with open(tmp_path / "packed.sql.zst", "rb") as f:
+        # One frame per commit, the reader goes on past the end of a frame
+        text = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True).read().decode("utf-8")
+    assert text == read_text(tmp_path / "plain.sql")
+
+
+def test_unknown_modes_are_refused(tmp_path):
+    with pytest.raises(ValueError, match="compression"):
+        OutputSink(str(tmp_path / "out.sql"), compression="bzip2")
+    with pytest.raises(ValueError, match="split"):
+        OutputSink(str(tmp_path / "out.sql"), split="rows")
+
+
+def test_split_by_table(fake_db, tmp_path):
+    export(fake_db, tmp_path / "plain.sql", partition_rows=120)
+    output = str(tmp_path / "split.sql")
+    export(fake_db, output, compression="gzip", split="table", partition_rows=120)
+    parts, texts = read_parts(output)
+    assert [part["file"] for part in parts] == [f"split.{i:04d}.sql.gz" for i in range(1, 5)]
+    assert [part["tables"] for part in parts] == [["T0001"], ["T0002"], ["T0003"], ["T0004"]]
+    assert "".join(texts) == read_text(tmp_path / "plain.sql")
+
+
+def test_split_by_size_resumes(fake_db, tmp_path):
+    export(fake_db, tmp_path / "plain.sql", partition_rows=100)
+    output = str(tmp_path / "split.sql")
+    options = {"compression": "gzip", "split": "size", "split_bytes": 20000, "partition_rows": 100}
+
+    def cancel_midway(snapshot):
+        if snapshot["rows"] >= 1100:
+            progress.cancel()
+
+    progress = Progress(cancel_midway, notify_seconds=0)
+    with pytest.raises(ExportCancelled):
+        export(fake_db, output, progress=progress, **options)
+    export(fake_db, output, resume=True, **options)
+    parts, texts = read_parts(output)
+    assert len(parts) > 1
+    assert "".join(texts) == read_text(tmp_path / "plain.sql")
+
+
+def test_shorter_export_removes_the_parts_of_a_longer_one(fake_db, tmp_path):
+    os.mkdir(tmp_path / "out")
+    output = str(tmp_path / "out" / "split.sql")
+    export(fake_db, output, compression="gzip", split="table")
+    export(fake_db, output, ["T0001"], compression="gzip", split="table")
+    parts, _ = read_parts(output)
+    assert [part["file"] for part in parts] == ["split.0001.sql.gz"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["split.0001.sql.gz", "split.index.json"]
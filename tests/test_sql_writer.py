@@ -0,0 +1,51 @@
+import sqlite3
+from io import StringIO
+
+from sql_writer import InsertWriter
+
+ROWS = [[str(i), f"'name {i}'"] for i in range(7)]
+
+
+def write(**options):
+    out = StringIO()
+    writer = InsertWriter(out, "Items", ["ID", "Name"], **options)
+    writer.add_rows(ROWS)
+    writer.close()
+    return writer, out.getvalue()
+
+
+def test_statements_hold_batch_rows():
+    writer, script = write(batch_rows=3)
+    assert writer.row_count == 7 and writer.statements == 3
+    assert script.count("INSERT INTO 'Items' (ID, Name) VALUES\n") == 3
+    assert script.startswith("INSERT INTO 'Items' (ID, Name) VALUES\n (0, 'name 0'),\n (1, 'name 1'),\n"
+                             " (2, 'name 2');\n")
+
+
+def test_statements_stay_under_batch_bytes():
+    writer, script = write(batch_rows=100, batch_bytes=80)
+    statements = [statement + ";\n" for statement in script.split(";\n") if statement]
+    assert len(statements) == writer.statements > 1
+    assert all(len(statement) <= 80 for statement in statements)
+
+
+def test_oversized_row_is_its_own_statement():
+    writer, _ = write(batch_bytes=1)
+    assert writer.statements == 7
+
+
+def test_commit_every_wraps_statements_into_transactions():
+    _, script = write(batch_rows=2, commit_every=3)
+    assert script.count("BEGIN;\n") == script.count("COMMIT;\n") == 2
+    assert script.endswith(" (6, 'name 6');\nCOMMIT;\n")
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE Items (ID INTEGER, Name TEXT)")
+    connection.executescript(script)
+    assert connection.execute("SELECT COUNT(*), MAX(Name) FROM Items").fetchone() == (7, "name 6")
+
+
+def test_no_rows_no_statement():
+    out = StringIO()
+    writer = InsertWriter(out, "Items", ["ID"], commit_every=1)
+    writer.close()
+    assert out.getvalue() == "" and writer.statements == 0